@@ -37,6 +37,11 @@ if 'messages' not in st.session_state:
 if 'selected_topic' not in st.session_state:
     st.session_state.selected_topic = "All Topics"
 
+# Worker processes used to parse multi-file uploads
+INGEST_WORKERS = min(4, os.cpu_count() or 1)
+# Embedding backend: 'torch', or 'onnx' for the int8 export (scripts/export_onnx_embedder.py)
+EMBED_BACKEND = os.environ.get("EDUBUDDY_EMBED_BACKEND", "torch")
+
 def main():
     if not st.session_state.authenticated:
         render_auth()
@@ -73,11 +78,23 @@ def render_home():
         
     input_method = st.radio("Choose Input Method:", ["📁 Upload Files", "📷 Use Webcam"], horizontal=True)
     
+    # Shared across sessions so chunks embedded once are never encoded again
+    @st.cache_resource
+    def get_embedding_cache():
+        from src.embed.embedding_cache import EmbeddingCache
+        return EmbeddingCache()
+
     # Cached Embedder Loader
     @st.cache_resource
     def get_embedder():
         from src.embed.embedder import Embedder
-        return Embedder()
+        return Embedder(cache=get_embedding_cache(), backend=EMBED_BACKEND)
+
+    # Shared across sessions so identical uploads skip parsing
+    @st.cache_resource
+    def get_parse_cache():
+        from src.ingest.parse_cache import ParseCache
+        return ParseCache()
 
     if input_method == "📁 Upload Files":
         uploaded_files = st.file_uploader("Upload Files", 
@@ -111,37 +128,42 @@ def render_home():
                         
                         progress_bar.progress(20)
                         
-                        # Ingest
-                        status_text.text("📖 Parsing and Chunking content...")
+                        # Ingest, Embed & Store
+                        # Chunks stream from the parsers into the index in batches, so the
+                        # store is searchable before the last file is finished
+                        status_text.text("📖 Parsing, chunking and embedding content...")
                         from src.ingest.ingestor import Ingestor
-                        ingestor = Ingestor()
-                        chunks = ingestor.ingest(saved_paths)
-                        
-                        # Note: We can't store 'saved_paths' in session_state if they are deleted.
-                        # We should store just the names or metadata.
-                        st.session_state.processed_files = [os.path.basename(p) for p in saved_paths]
-                        
-                        progress_bar.progress(50)
-                        
-                        # Embed & Store
-                        status_text.text("🧠 Generating Embeddings (this may take a moment)...")
                         from src.embed.indexer import VectorStore
                         
                         embedder = get_embedder()
-                        texts = [c['text'] for c in chunks]
-                        embeddings = embedder.embed_chunks(texts)
+                        # Grow the existing index instead of starting over
+                        if st.session_state.vector_store is None:
+                            st.session_state.vector_store = VectorStore()
+                        vector_store = st.session_state.vector_store
                         
-                        progress_bar.progress(80)
+                        ingestor = Ingestor(workers=INGEST_WORKERS, cache=get_parse_cache())
+                        new_paths = ingestor.pending_files(saved_paths, vector_store)
                         
-                        status_text.text("💾 Storing in Vector Database...")
-                        vector_store = VectorStore()
-                        vector_store.add_embeddings(embeddings, chunks)
+                        # Note: We can't store 'saved_paths' in session_state if they are deleted.
+                        # We should store just the names or metadata.
+                        for p in new_paths:
+                            if os.path.basename(p) not in st.session_state.processed_files:
+                                st.session_state.processed_files.append(os.path.basename(p))
                         
-                        st.session_state.vector_store = vector_store
+                        def on_batch(total):
+                            status_text.text(f"🧠 Indexed {total} chunks...")
+                        
+                        ingestor.ingest_into(new_paths, embedder, vector_store, on_batch=on_batch)
                         
                         progress_bar.progress(100)
                         status_text.text("✅ Done!")
-                        st.success(f"Successfully processed {len(saved_paths)} files!")
+                        skipped = len(saved_paths) - len(new_paths)
+                        if skipped:
+                            st.info(f"Skipped {skipped} file(s) that were already indexed.")
+                        if ingestor.reused:
+                            st.info(f"Updated documents: reused {ingestor.reused} unchanged chunks, "
+                                    f"embedded {ingestor.recomputed} new or changed ones.")
+                        st.success(f"Successfully processed {len(new_paths)} files!")
                         st.balloons()
                     
 
@@ -153,7 +175,7 @@ def render_home():
                 st.warning("Please upload files first.")
         
         st.divider()
-        if st.button("🗑️ Reset / Clear All Data", type="secondary", width="stretch", help="Clears all uploaded files, quizzes, and chat history."):
+        if st.button("🗑️ Reset / Clear All Data", type="secondary", width="stretch", help="Clears all uploaded files, cached parses and embeddings, quizzes, and chat history."):
             # Clear critical session state vars
             keys_to_clear = ['processed_files', 'vector_store', 'quiz_history', 'quiz_history_detailed', 'messages', 'selected_topic']
             for key in keys_to_clear:
@@ -168,10 +190,21 @@ def render_home():
             st.session_state.messages = []
             st.session_state.selected_topic = "All Topics"
             
+            # Purge parsed copies of uploads kept for re-use
+            get_parse_cache().clear()
+            get_embedding_cache().clear()
+            
             st.success("App reset successfully!")
             st.rerun()
 
     else: # Webcam
+        # Load the OCR model in the background while the user frames the photo
+        # (reruns while it is still loading don't start another one)
+        from src.ingest.ocr_engine import get_ocr_engine
+        ocr_engine = get_ocr_engine()
+        if ocr_engine.available():
+            ocr_engine.warm_up_in_background()
+        
         picture = st.camera_input("Take a picture of your notes")
         
         if picture:
@@ -193,32 +226,23 @@ def render_home():
                     saved_paths = [path]
                     progress_bar.progress(30)
                     
-                    # Ingest
+                    # Ingest, Embed & Store into the existing index
                     status_text.text("📖 Extracting text from image...")
                     from src.ingest.ingestor import Ingestor
-                    ingestor = Ingestor()
-                    chunks = ingestor.ingest(saved_paths)
-                    
-                    progress_bar.progress(60)
-                    
-                    # Embed & Store
-                    status_text.text("🧠 Generating Embeddings...")
                     from src.embed.indexer import VectorStore
                     
                     embedder = get_embedder()
-                    texts = [c['text'] for c in chunks]
-                    embeddings = embedder.embed_chunks(texts)
+                    if st.session_state.vector_store is None:
+                        st.session_state.vector_store = VectorStore()
+                    vector_store = st.session_state.vector_store
                     
-                    progress_bar.progress(90)
+                    def on_batch(total):
+                        status_text.text(f"🧠 Indexed {total} chunks...")
+                        progress_bar.progress(90)
                     
-                    vector_store = VectorStore()
-                    vector_store.add_embeddings(embeddings, chunks)
+                    Ingestor().ingest_into(saved_paths, embedder, vector_store, on_batch=on_batch)
                     
-                    st.session_state.vector_store = vector_store
-                    if st.session_state.processed_files:
-                        st.session_state.processed_files.extend(saved_paths)
-                    else:
-                        st.session_state.processed_files = saved_paths
+                    st.session_state.processed_files.extend(saved_paths)
                         
                     progress_bar.progress(100)
                     status_text.text("✅ Done!")
@@ -248,7 +272,7 @@ def render_study():
         st.subheader("📚 Study Material")
         
         # Extract unique topics
-        all_topics = sorted(list(set([m['metadata']['topic'] for m in st.session_state.vector_store.metadata if 'topic' in m.get('metadata', {})])))
+        all_topics = st.session_state.vector_store.topics()
         if not all_topics:
             all_topics = ["General"]
             
@@ -280,10 +304,11 @@ def render_study():
                 if st.session_state.selected_topic == "All Topics":
                     docs = st.session_state.vector_store.metadata
                 else:
-                    docs = [m for m in st.session_state.vector_store.metadata if m.get('metadata', {}).get('topic') == st.session_state.selected_topic]
+                    docs = st.session_state.vector_store.chunks_where(topic=st.session_state.selected_topic)
                 
                 if docs:
-                    all_text = " ".join([m['text'] for m in docs])
+                    # Only the text the summarizer reads is decoded
+                    all_text = docs.joined_text(5000)
                     
                     @st.cache_resource
                     def get_summarizer():
@@ -370,15 +395,16 @@ def render_study():
                     def get_models_v3(): 
                         from src.embed.embedder import Embedder
                         from src.rag.generator import Generator
-                        return Embedder(), Generator()
+                        return Embedder(backend=EMBED_BACKEND), Generator()
 
                     embedder, generator = get_models_v3()
                     
                     from src.rag.retriever import Retriever
                     retriever = Retriever(embedder, st.session_state.vector_store)
                     
-                    # Retrieve context
-                    context = retriever.retrieve(user_query)
+                    # Retrieve context, from the selected topic only
+                    scope = st.session_state.selected_topic
+                    context = retriever.retrieve(user_query, topic=None if scope == "All Topics" else scope)
                     
                     # Debug: Check if context is retrieved
                     if not context:
@@ -405,7 +431,7 @@ def render_quiz():
         return
 
     # --- Topic Selection ---
-    all_topics = sorted(list(set([m['metadata']['topic'] for m in st.session_state.vector_store.metadata if 'topic' in m.get('metadata', {})])))
+    all_topics = st.session_state.vector_store.topics()
     if not all_topics:
         all_topics = ["General"]
     
@@ -417,7 +443,7 @@ def render_quiz():
             if selected_topic == "All Topics":
                 docs = st.session_state.vector_store.metadata
             else:
-                docs = [m for m in st.session_state.vector_store.metadata if m.get('metadata', {}).get('topic') == selected_topic]
+                docs = st.session_state.vector_store.chunks_where(topic=selected_topic)
             
             if not docs:
                 st.error("No content found for this topic.")
@@ -627,7 +653,7 @@ def render_progress():
             df_det = pd.DataFrame(st.session_state.quiz_history_detailed)
             if 'topic' in df_det.columns:
                 # Get list of all available topics from vector store
-                all_available_topics = set([m['metadata']['topic'] for m in st.session_state.vector_store.metadata if 'topic' in m.get('metadata', {})])
+                all_available_topics = set(st.session_state.vector_store.topics())
                 if not all_available_topics:
                     all_available_topics = {"General"}
                 
@@ -0,0 +1,80 @@
+"""
+Query latency and recall of the flat index against the IVF index the
+VectorStore switches to above ANN_THRESHOLD, on clustered synthetic
+embeddings (real chunk embeddings cluster by topic; uniform noise would
+be a worst case for IVF). Also times the flat -> IVF migration.
+
+Usage: python scripts/bench_ann_index.py [--chunks 200000] [--queries 200] [--nprobe 4 8 16 32 64]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.indexer import VectorStore
+
+DIMENSION = 384
+TOPICS = 2000
+K = 10
+
+def clustered(rng, count: int, centers: np.ndarray) -> np.ndarray:
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.06 * rng.standard_normal((count, DIMENSION))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype('float32')
+
+def fill(store: VectorStore, vectors: np.ndarray, doc_chunks: int = 1000):
+    for start in range(0, len(vectors), doc_chunks):
+        source = f"doc_{start // doc_chunks}.pdf"
+        part = vectors[start:start + doc_chunks]
+        store.add_embeddings(part, [
+            {"id": f"{source}_{i}", "text": "", "metadata": {"source": source, "chunk_index": i, "topic": source}}
+            for i in range(len(part))
+        ])
+
+def run_queries(store: VectorStore, queries: np.ndarray):
+    results, samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search(query, K)
+        samples.append(time.perf_counter() - start)
+        # Both stores get ids in insertion order, so the same vector has the same id
+        results.append({item.chunk_id for item, _ in hits})
+    return results, np.percentile(np.array(samples) * 1000, 50)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((TOPICS, DIMENSION)) / np.sqrt(DIMENSION)
+    vectors = clustered(rng, args.chunks, centers)
+    queries = clustered(rng, args.queries, centers)
+
+    flat = VectorStore(DIMENSION, ann_threshold=args.chunks + 1)
+    fill(flat, vectors)
+    truth, flat_ms = run_queries(flat, queries)
+
+    # Threshold at the last batch, so that add_embeddings call does the migration
+    ann = VectorStore(DIMENSION, ann_threshold=args.chunks)
+    fill(ann, vectors[:-1000])
+    start = time.perf_counter()
+    fill(ann, vectors[-1000:])
+    migrate_s = time.perf_counter() - start
+
+    print(f"{args.chunks} chunks, {args.queries} queries, recall@{K} against the flat index")
+    print(f"  flat         p50 {flat_ms:6.2f} ms   recall 1.000")
+    for nprobe in args.nprobe:
+        ann.nprobe = nprobe
+        found, ms = run_queries(ann, queries)
+        recall = np.mean([len(f & t) / K for f, t in zip(found, truth)])
+        print(f"  ivf nprobe {nprobe:<3} p50 {ms:6.2f} ms   recall {recall:.3f}")
+    print(f"add_embeddings call that migrated flat -> {ann.index_type}: {migrate_s:.1f} s")
+
+if __name__ == "__main__":
+    main()
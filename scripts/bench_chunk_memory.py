@@ -0,0 +1,83 @@
+"""
+Measures memory held by chunk dicts (process_file_content) vs compact
+Chunk records (make_chunks) for the same synthetic documents.
+
+Usage: python scripts/bench_chunk_memory.py [--chunks 10000] [--docs 20]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ingest.chunker import process_file_content, make_chunks
+from src.ingest.chunk import DocumentStore
+
+PARAGRAPH = (
+    "Machine learning is a field of study in artificial intelligence concerned with "
+    "the development of statistical algorithms that can learn from data and generalize "
+    "to unseen data, and thus perform tasks without explicit instructions. "
+)
+CHUNK_SIZE = 1000
+OVERLAP = 200
+TOPICS_PER_DOC = 10
+
+def make_documents(num_chunks: int, num_docs: int):
+    """Documents of topic segments that chunk into about num_chunks chunks."""
+    chars_per_doc = num_chunks * (CHUNK_SIZE - OVERLAP) // num_docs
+    segment_chars = chars_per_doc // TOPICS_PER_DOC
+    docs = []
+    for d in range(num_docs):
+        segments = []
+        for t in range(TOPICS_PER_DOC):
+            content = (f"[doc {d} topic {t}] " + PARAGRAPH * (segment_chars // len(PARAGRAPH) + 1))[:segment_chars]
+            segments.append({'topic': f"Chapter {t + 1}", 'content': content})
+        docs.append((f"document_{d}.pdf", segments))
+    return docs
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def build_dicts(docs):
+    chunks = []
+    for file_name, segments in docs:
+        for segment in segments:
+            for chunk in process_file_content(file_name, segment['content'], CHUNK_SIZE, OVERLAP):
+                chunk['metadata']['topic'] = segment['topic']
+                chunks.append(chunk)
+    return chunks
+
+def build_records(docs):
+    store = DocumentStore()
+    chunks = []
+    for file_name, segments in docs:
+        chunks.extend(make_chunks(store, file_name, segments, CHUNK_SIZE, OVERLAP))
+    return chunks
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--docs", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = make_documents(args.chunks, args.docs)
+    dicts, dict_bytes = measure(lambda: build_dicts(docs))
+    records, record_bytes = measure(lambda: build_records(docs))
+    assert [c.to_dict() for c in records] == dicts
+
+    per_10k = 10000 / len(dicts) / (1024 * 1024)
+    print(f"{len(dicts)} chunks from {args.docs} documents")
+    print(f"chunk dicts:   {dict_bytes * per_10k:7.2f} MB per 10k chunks")
+    print(f"Chunk records: {record_bytes * per_10k:7.2f} MB per 10k chunks "
+          f"({dict_bytes / record_bytes:.1f}x smaller)")
+
+if __name__ == "__main__":
+    main()
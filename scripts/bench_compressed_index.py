@@ -0,0 +1,83 @@
+"""
+Memory per million chunks and recall@10 (against an exact flat index) of
+the VectorStore storage options: float32 IVF, SQ8 and PQ, the compressed
+ones with and without float16 re-ranking. Uses clustered synthetic
+embeddings, as scripts/bench_ann_index.py does.
+
+Usage: python scripts/bench_compressed_index.py [--chunks 200000] [--queries 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import faiss
+import numpy as np
+from src.embed.indexer import VectorStore
+
+DIMENSION = 384
+TOPICS = 2000
+K = 10
+
+def clustered(rng, count: int, centers: np.ndarray) -> np.ndarray:
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.06 * rng.standard_normal((count, DIMENSION))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype('float32')
+
+def build(vectors: np.ndarray, **options) -> VectorStore:
+    store = VectorStore(DIMENSION, ann_threshold=len(vectors), **options)
+    for start in range(0, len(vectors), 10000):
+        part = vectors[start:start + 10000]
+        store.add_embeddings(part, [
+            {"id": str(start + i), "text": "", "metadata": {"source": "doc", "chunk_index": i, "topic": "t"}}
+            for i in range(len(part))
+        ])
+    return store
+
+def evaluate(store: VectorStore, queries: np.ndarray, truth):
+    found, samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        # Store ids are assigned in insertion order, so they are the vector rows
+        found.append({item.chunk_id for item, _ in store.search(query, K)})
+        samples.append(time.perf_counter() - start)
+    recall = np.mean([len(f & t) / K for f, t in zip(found, truth)])
+    return recall, np.percentile(np.array(samples) * 1000, 50)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((TOPICS, DIMENSION)) / np.sqrt(DIMENSION)
+    vectors = clustered(rng, args.chunks, centers)
+    queries = clustered(rng, args.queries, centers)
+
+    exact = faiss.IndexFlatL2(DIMENSION)
+    exact.add(vectors)
+    _, truth_ids = exact.search(queries, K)
+    truth = [set(row.tolist()) for row in truth_ids]
+    print(f"{args.chunks} chunks, {args.queries} queries, nprobe 32")
+    print(f"{'storage':<18} {'RAM MB/1M':>10} {'disk MB/1M':>11} {'recall@10':>10} {'p50 ms':>8}")
+    print(f"{'flat float32':<18} {exact.ntotal * DIMENSION * 4 / args.chunks:>10.0f} {'-':>11} {1.0:>10.3f} {'-':>8}")
+
+    for compression in (None, 'sq8', 'pq'):
+        store = build(vectors, compression=compression)
+        # Serialized size ~ resident size of the index (codes, ids, centroids)
+        ram = len(faiss.serialize_index(store.index)) / args.chunks
+        # The float16 copy is kept for retraining whether or not searches re-rank
+        disk = DIMENSION * 2 if compression else 0
+        for rerank in ((False, True) if compression else (False,)):
+            store.rerank = rerank
+            recall, ms = evaluate(store, queries, truth)
+            name = f"ivf {compression or 'float32'}" + (" + rerank" if rerank else "")
+            print(f"{name:<18} {ram:>10.0f} {disk:>11.0f} {recall:>10.3f} {ms:>8.2f}")
+        if store.vector_file is not None:
+            store.vector_file.close()
+
+if __name__ == "__main__":
+    main()
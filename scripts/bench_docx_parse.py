@@ -0,0 +1,74 @@
+"""
+Benchmarks DOCX parsing + segmentation: python-docx paragraphs with regex
+segmentation (the previous path) vs the streaming reader with heading styles.
+
+Usage: python scripts/bench_docx_parse.py [--pages 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import docx
+from src.ingest.ingestor import parse_and_segment
+from src.ingest.text_parser import parse_docx
+from src.ingest.topic_extractor import TopicExtractor
+
+PARAGRAPH = (
+    "To replace the filter cartridge, switch the unit off at the mains and wait until "
+    "the indicator light goes out. Release both side clips, lift the cover and pull the "
+    "old cartridge straight up. Fit the new cartridge with the arrow pointing towards the "
+    "pump, then refit the cover and run the unit for five minutes before first use. "
+)
+PARAGRAPHS_PER_PAGE = 6 # ~500 words
+PAGES_PER_CHAPTER = 25
+PAGES_PER_SECTION = 5
+
+def generate_manual(path: str, pages: int):
+    document = docx.Document()
+    for page in range(pages):
+        if page % PAGES_PER_CHAPTER == 0:
+            document.add_heading(f"Chapter {page // PAGES_PER_CHAPTER + 1}: Maintenance", level=1)
+        if page % PAGES_PER_SECTION == 0:
+            document.add_heading(f"Procedure {page // PAGES_PER_SECTION + 1}", level=2)
+            table = document.add_table(rows=4, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"Part {r}-{c}"
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            document.add_paragraph(PARAGRAPH)
+    document.save(path)
+
+def previous_parse_and_segment(path: str):
+    text = ""
+    for para in docx.Document(path).paragraphs:
+        text += para.text + "\n"
+    return TopicExtractor().extract_segments(text)
+
+def time_it(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "manual.docx")
+        generate_manual(path, args.pages)
+        chars = len(parse_docx(path))
+        print(f"{args.pages}-page manual: {os.path.getsize(path) / 1024:.0f} KB docx, {chars / 1e6:.1f}M chars")
+
+        old, old_s = time_it(lambda: previous_parse_and_segment(path))
+        new, new_s = time_it(lambda: parse_and_segment(path))
+        print(f"python-docx + regex segmentation: {old_s:.2f}s, {len(old)} segments")
+        print(f"streaming reader + heading styles: {new_s:.2f}s, {len(new)} segments "
+              f"({old_s / new_s:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the torch and int8 ONNX embedding backends: model load time,
+chunks/sec, resident memory and how closely the vectors agree.
+
+Each backend runs in a fresh interpreter, so load time includes imports.
+The ONNX backend needs scripts/export_onnx_embedder.py to have run.
+
+Usage: python scripts/bench_embed_backends.py [--chunks 512] [--onnx-dir DIR]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+texts = json.load(open({texts!r}))
+start = time.perf_counter()
+from src.embed.embedder import Embedder
+embedder = Embedder(backend={backend!r}, onnx_dir={onnx_dir!r})
+load = time.perf_counter() - start
+embedder.embed_chunks(texts[:8])
+start = time.perf_counter()
+vectors = embedder.embed_chunks(texts)
+encode = time.perf_counter() - start
+import numpy as np
+np.save({out!r}, np.asarray(vectors, dtype=np.float32))
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{'load': load, 'encode': encode, 'peak_mb': peak_mb}}))
+"""
+
+def make_texts(count: int):
+    rng = np.random.default_rng(0)
+    words = ["energy", "cell", "force", "history", "equation", "protein", "market", "river",
+             "theory", "climate", "atom", "language", "network", "memory", "light", "empire"]
+    return [" ".join(rng.choice(words, int(rng.integers(10, 180)))) for _ in range(count)]
+
+def run(backend: str, texts_path: str, out: str, onnx_dir) -> dict:
+    code = PROBE.format(root=ROOT, texts=texts_path, backend=backend, onnx_dir=onnx_dir, out=out)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--onnx-dir", default=None)
+    args = parser.parse_args()
+
+    from src.embed.onnx_backend import cosine_agreement, COSINE_TOLERANCE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w") as f:
+            json.dump(make_texts(args.chunks), f)
+
+        vectors = {}
+        print(f"{'backend':<8} {'load s':>8} {'chunks/s':>10} {'peak MB':>9}")
+        for backend in ("torch", "onnx"):
+            out = os.path.join(tmp, f"{backend}.npy")
+            stats = run(backend, texts_path, out, args.onnx_dir)
+            if "error" in stats:
+                print(f"{backend:<8} error: {stats['error']}")
+                continue
+            vectors[backend] = np.load(out)
+            print(f"{backend:<8} {stats['load']:>8.2f} {args.chunks / stats['encode']:>10.0f} {stats['peak_mb']:>9.0f}")
+
+        if len(vectors) == 2:
+            agreement = cosine_agreement(vectors["torch"], vectors["onnx"])
+            print(f"lowest cosine torch vs onnx: {agreement:.4f} (tolerance {COSINE_TOLERANCE})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fixed batches of 32 against length-bucketed batches (Embedder's default)
+on a mixed corpus: 1000-char PDF chunks, short OCR snippets from
+screenshots and mid-length video transcript chunks, shuffled as they
+arrive from a mixed upload.
+
+Reports padded tokens (items x longest item, summed over batches, i.e.
+the work the transformer does) for embed_chunks calls of --call-size
+chunks, which is how ingestion calls it. With sentence-transformers
+installed it also times both modes on the real model.
+
+Usage: python scripts/bench_embed_batching.py [--chunks 3000] [--call-size 64]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+def make_corpus(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    words = [f"word{i}" for i in range(3000)]
+    texts = []
+    for kind in rng.choice(["pdf", "ocr", "video"], count, p=[0.5, 0.3, 0.2]):
+        n_words = {"pdf": 150, "ocr": int(rng.integers(2, 12)), "video": int(rng.integers(30, 90))}[kind]
+        texts.append(" ".join(rng.choice(words, n_words)))
+    return texts
+
+def fixed_batches(lengths, size=32):
+    # SentenceTransformer.encode sorts each call by length before cutting batches
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    return [order[i:i + size] for i in range(0, len(order), size)]
+
+def padded_tokens(batches, lengths):
+    return sum(len(b) * max(lengths[i] for i in b) for b in batches)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=3000)
+    parser.add_argument("--call-size", type=int, default=64, help="chunks per embed_chunks call")
+    args = parser.parse_args()
+
+    import src.embed.embedder as embedder_module
+    texts = make_corpus(args.chunks)
+    calls = [texts[i:i + args.call_size] for i in range(0, len(texts), args.call_size)]
+
+    def estimate(batch_texts):
+        return [min(len(t) // embedder_module.CHARS_PER_TOKEN + 2, 256) for t in batch_texts]
+
+    totals = {"fixed": [0, 0], "bucketed": [0, 0]}
+    real = sum(estimate(texts))
+    for call in calls:
+        lengths = estimate(call)
+        for mode, batches in (("fixed", fixed_batches(lengths)), ("bucketed", embedder_module.length_batches(lengths))):
+            totals[mode][0] += padded_tokens(batches, lengths)
+            totals[mode][1] += len(batches)
+
+    print(f"{args.chunks} chunks in calls of {args.call_size}, {real} real tokens")
+    for mode, (tokens, batches) in totals.items():
+        print(f"  {mode:9} {tokens:9} padded tokens ({tokens / real:.2f}x real), {batches} batches")
+
+    try:
+        embedder = embedder_module.Embedder()
+    except Exception as e:
+        print(f"model not timed ({e})")
+        return
+    for mode, bucketing in (("fixed", False), ("bucketed", True)):
+        embedder.length_bucketing = bucketing
+        start = time.perf_counter()
+        for call in calls:
+            embedder.embed_chunks(call)
+        elapsed = time.perf_counter() - start
+        print(f"  {mode:9} {elapsed:.1f} s ({args.chunks / elapsed:.0f} chunks/s)")
+
+if __name__ == "__main__":
+    main()
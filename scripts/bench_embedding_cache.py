@@ -0,0 +1,76 @@
+"""
+Cost of the persistent embedding cache on a re-upload where a share of the
+chunks changed: lookup/store time per chunk and the hit rate, plus (with
+sentence-transformers installed) the encode time the hits saved.
+
+Usage: python scripts/bench_embedding_cache.py [--chunks 5000] [--changed 0.1] [--no-model]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.embedding_cache import EmbeddingCache
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DIMENSION = 384
+
+def make_chunks(count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    words = [f"term{i}" for i in range(5000)]
+    return [" ".join(rng.choice(words, 150)) for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--changed", type=float, default=0.1, help="share of chunks edited before re-upload")
+    parser.add_argument("--no-model", action="store_true", help="skip timing the real encoder")
+    args = parser.parse_args()
+
+    first = make_chunks(args.chunks, 0)
+    edited = make_chunks(int(args.chunks * args.changed), 1)
+    second = edited + first[len(edited):]
+    vectors = np.random.default_rng(2).standard_normal((args.chunks, DIMENSION), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(tmp, max_entries=args.chunks * 2)
+
+        start = time.perf_counter()
+        _, misses = cache.get_many(MODEL_NAME, first)
+        cache.put_many(MODEL_NAME, [first[i] for i in misses], vectors[misses])
+        cold_s = time.perf_counter() - start
+
+        cache.hits = cache.misses = 0
+        start = time.perf_counter()
+        found, misses = cache.get_many(MODEL_NAME, second)
+        cache.put_many(MODEL_NAME, [second[i] for i in misses], vectors[misses])
+        warm_s = time.perf_counter() - start
+
+        error = max(float(np.abs(found[i] - vectors[i]).max()) for i in found)
+        print(f"{args.chunks} chunks, {len(edited)} edited before re-upload")
+        print(f"first upload (all misses): {cold_s * 1000:.0f} ms cache overhead "
+              f"({cold_s / args.chunks * 1e6:.0f} us/chunk)")
+        print(f"re-upload: hit rate {cache.hit_rate():.1%}, {warm_s * 1000:.0f} ms cache overhead "
+              f"({warm_s / args.chunks * 1e6:.0f} us/chunk)")
+        print(f"max float16 round-trip error: {error:.2e}")
+
+    if args.no_model:
+        return
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
+    except Exception as e:
+        print(f"encoder not timed ({e})")
+        return
+    sample = first[:500]
+    start = time.perf_counter()
+    model.encode(sample, batch_size=32)
+    encode_s = (time.perf_counter() - start) / len(sample)
+    print(f"encode: {encode_s * 1e6:.0f} us/chunk -> re-upload saves ~{len(found) * encode_s:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Topic-filtered search: VectorStore.search(topic=...) (id selector from the
+per-topic rows) vs searching the whole store and post-filtering, fetching
+more candidates until k of the topic turn up. Reports latency and recall@10
+against exact search among the topic's chunks, for a common topic and a
+rare one. Uses clustered synthetic embeddings, as
+scripts/bench_ann_index.py does.
+
+Usage: python scripts/bench_filtered_search.py [--chunks 100000] [--queries 200] [--compression sq8|pq]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.indexer import VectorStore
+
+DIMENSION = 384
+CLUSTERS = 2000
+TOPICS = 40
+RARE_CHUNKS = 300
+K = 10
+
+def post_filtered(store: VectorStore, query: np.ndarray, topic: str):
+    """The old way: over-fetch from the whole store and keep the topic's chunks."""
+    fetch = K * 4
+    while True:
+        hits = [item for item, _ in store.search(query, fetch) if item.topic == topic]
+        if len(hits) >= K or fetch >= len(store):
+            return hits[:K]
+        fetch *= 4
+
+def measure(search, queries, truth):
+    found, samples = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = search(query)
+        samples.append(time.perf_counter() - start)
+        found.append(len({item.chunk_id for item in hits} & expected) / len(expected))
+    return np.percentile(np.array(samples) * 1000, 50), np.percentile(np.array(samples) * 1000, 95), np.mean(found)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--compression", default=None, choices=["sq8", "pq"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((CLUSTERS, DIMENSION)) / np.sqrt(DIMENSION)
+    assignment = rng.integers(0, CLUSTERS, args.chunks)
+    vectors = centers[assignment] + 0.06 * rng.standard_normal((args.chunks, DIMENSION))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype('float32')
+    # Each topic spans many clusters; a few scattered chunks form a rare topic
+    topics = np.array([f"Chapter {c % TOPICS + 1}" for c in assignment], dtype=object)
+    topics[rng.choice(args.chunks, RARE_CHUNKS, replace=False)] = "Appendix"
+
+    store = VectorStore(DIMENSION, compression=args.compression)
+    for start in range(0, args.chunks, 10000):
+        part = slice(start, start + 10000)
+        store.add_embeddings(vectors[part], [
+            {"id": str(start + i), "text": "", "metadata": {"source": "doc", "chunk_index": i, "topic": topic}}
+            for i, topic in enumerate(topics[part])
+        ])
+
+    print(f"{args.chunks} chunks ({store.index_type}, {args.compression or 'float32'}), "
+          f"{args.queries} queries, recall@{K} against exact search within the topic")
+    print(f"{'topic':<22} {'method':<12} {'p50 ms':>8} {'p95 ms':>8} {'recall':>8}")
+    for topic in ("Chapter 1", "Appendix"):
+        members = np.flatnonzero(topics == topic)
+        # Questions about the selected topic: near one of its chunks
+        queries = vectors[rng.choice(members, args.queries)] + 0.03 * rng.standard_normal((args.queries, DIMENSION)).astype('float32')
+        truth = []
+        for query in queries:
+            distances = ((vectors[members] - query) ** 2).sum(axis=1)
+            truth.append(set(members[np.argsort(distances)[:K]].tolist()))
+        store.search(queries[0], K, topic=topic)
+        label = f"{topic} ({len(members)})"
+        for method, search in (
+            ("post-filter", lambda q: post_filtered(store, q, topic)),
+            ("id selector", lambda q: [item for item, _ in store.search(q, K, topic=topic)]),
+        ):
+            p50, p95, recall = measure(search, queries, truth)
+            print(f"{label:<22} {method:<12} {p50:>8.2f} {p95:>8.2f} {recall:>8.3f}")
+
+if __name__ == "__main__":
+    main()
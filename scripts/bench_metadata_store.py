@@ -0,0 +1,100 @@
+"""
+Compares the old pickled list of chunk dicts with the columnar ChunkTable:
+file size, load time and memory after load, and the time of a topic
+filter (list scan vs vectorized chunks_where).
+
+Usage: python scripts/bench_metadata_store.py [--chunks 200000] [--topics 50]
+"""
+import argparse
+import gc
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.embed.metadata_store import ChunkTable
+
+SOURCES = 200
+CHUNK_CHARS = 800
+
+def make_chunks(num_chunks: int, num_topics: int):
+    words = "gradient descent minimizes the loss function by following the negative slope ".split()
+    chunks = []
+    for i in range(num_chunks):
+        text = " ".join(words[(i + j) % len(words)] for j in range(CHUNK_CHARS // 7))[:CHUNK_CHARS]
+        chunks.append({
+            "id": f"doc_{i % SOURCES}_{i}",
+            "text": f"{i} {text}",
+            "metadata": {"source": f"doc_{i % SOURCES}.pdf", "chunk_index": i // SOURCES,
+                         "topic": f"Chapter {i % num_topics}"}
+        })
+    return chunks
+
+def measure(load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def dir_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--topics", type=int, default=50)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.topics)
+    topic = "Chapter 7"
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_dir = os.path.join(tmp, "pickle")
+        table_dir = os.path.join(tmp, "table")
+        os.makedirs(pickle_dir)
+        os.makedirs(table_dir)
+        with open(os.path.join(pickle_dir, "metadata.pkl"), "wb") as f:
+            pickle.dump(chunks, f)
+        table = ChunkTable()
+        table.append(range(len(chunks)), chunks)
+        table.save(table_dir)
+        del chunks, table
+
+        def load_pickle():
+            with open(os.path.join(pickle_dir, "metadata.pkl"), "rb") as f:
+                return pickle.load(f)
+
+        loaded, pickle_load, pickle_mem = measure(load_pickle)
+        table, table_load, table_mem = measure(lambda: ChunkTable.load(table_dir))
+
+        scan = [c for c in loaded if c["metadata"].get("topic") == topic]
+        view = table.view(table.rows(topic=topic))
+        assert [c["text"] for c in scan] == [r.text for r in view]
+        scan_s = timed(lambda: [c for c in loaded if c["metadata"].get("topic") == topic])
+        filter_s = timed(lambda: table.rows(topic=topic))
+
+        print(f"{args.chunks} chunks, {args.topics} topics, filter keeps {len(scan)}")
+        print(f"{'':<14} {'on disk MB':>10} {'load ms':>9} {'heap MB':>9} {'filter ms':>10}")
+        print(f"{'pickled dicts':<14} {dir_size(pickle_dir) / 2**20:>10.1f} {pickle_load * 1e3:>9.1f} "
+              f"{pickle_mem / 2**20:>9.1f} {scan_s * 1e3:>10.2f}")
+        print(f"{'chunk table':<14} {dir_size(table_dir) / 2**20:>10.1f} {table_load * 1e3:>9.1f} "
+              f"{table_mem / 2**20:>9.1f} {filter_s * 1e3:>10.2f}")
+
+if __name__ == "__main__":
+    main()
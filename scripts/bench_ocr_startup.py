@@ -0,0 +1,69 @@
+"""
+Reports start-up time and resident memory of the OCR setup.
+
+Each scenario runs in a fresh interpreter:
+  import   - importing the ingest package (OCR is no longer loaded here)
+  shared   - import + warming up the shared OCR engine
+  legacy   - two eager easyocr.Reader instances, as the parsers used to build
+
+Usage: python scripts/bench_ocr_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = {
+    "import": "import src.ingest.text_parser",
+    "shared": (
+        "import src.ingest.text_parser\n"
+        "from src.ingest.ocr_engine import get_ocr_engine\n"
+        "get_ocr_engine().warm_up()"
+    ),
+    "legacy": (
+        "import easyocr\n"
+        "readers = [easyocr.Reader(['en'], gpu=False, verbose=False) for _ in range(2)]"
+    ),
+}
+
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+rss_mb = None
+try:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss_mb = int(line.split()[1]) / 1024
+except OSError:
+    pass
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb, 'peak_mb': peak_mb}}))
+"""
+
+def run(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=ROOT, code=code)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    print(f"{'scenario':<10} {'seconds':>9} {'rss MB':>9} {'peak MB':>9}")
+    for name, code in SCENARIOS.items():
+        stats = run(code)
+        if "error" in stats:
+            print(f"{name:<10} error: {stats['error']}")
+            continue
+        rss = f"{stats['rss_mb']:.0f}" if stats['rss_mb'] is not None else "n/a"
+        print(f"{name:<10} {stats['seconds']:>9.2f} {rss:>9} {stats['peak_mb']:>9.0f}")
+
+if __name__ == "__main__":
+    main()
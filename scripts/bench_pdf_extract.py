@@ -0,0 +1,60 @@
+"""
+Benchmarks serial vs page-sharded PDF text extraction.
+
+Usage: python scripts/bench_pdf_extract.py [--pages 600] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fpdf import FPDF
+from src.ingest.pdf_parser import extract_pdf_text
+
+PARAGRAPH = (
+    "Machine learning is a field of study in artificial intelligence concerned with "
+    "the development of statistical algorithms that can learn from data and generalize "
+    "to unseen data, and thus perform tasks without explicit instructions. "
+)
+
+def generate_pdf(path: str, pages: int):
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page_num in range(pages):
+        pdf.add_page()
+        pdf.cell(0, 10, txt=f"Chapter {page_num // 20 + 1}: Page {page_num + 1}", ln=1)
+        for _ in range(12):
+            pdf.multi_cell(0, 5, txt=PARAGRAPH)
+    pdf.output(path)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.pdf")
+        print(f"Generating {args.pages}-page PDF...")
+        generate_pdf(path, args.pages)
+        print(f"File size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        serial = extract_pdf_text(path, workers=1)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sharded = extract_pdf_text(path, workers=args.workers)
+        sharded_time = time.perf_counter() - start
+
+        assert serial == sharded, "Sharded extraction differs from serial output"
+        assert len(serial.page_offsets) == args.pages
+        print(f"Serial:              {serial_time:.2f}s")
+        print(f"Sharded ({args.workers} workers): {sharded_time:.2f}s  ({serial_time / sharded_time:.2f}x)")
+        print(f"Characters: {len(serial.text)}, page offsets: {len(serial.page_offsets)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+p50/p95 latency of Retriever.retrieve for repeated questions with and
+without the query embedding cache, next to the bare FAISS search.
+
+Usage: python scripts/bench_query_cache.py [--chunks 20000] [--queries 200] [--distinct 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.embedder import Embedder
+from src.embed.indexer import VectorStore
+from src.rag.retriever import Retriever, QueryEmbeddingCache
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):7.2f} ms   p95 {np.percentile(ms, 95):7.2f} ms"
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20, help="distinct questions among the queries")
+    args = parser.parse_args()
+
+    embedder = Embedder()
+    dimension = len(embedder.embed_text("warm up"))
+    store = VectorStore(dimension)
+    vectors = np.random.default_rng(0).standard_normal((args.chunks, dimension), dtype=np.float32)
+    store.add_embeddings(vectors, [
+        {"id": f"doc_{i}", "text": f"chunk {i}", "metadata": {"source": "doc", "chunk_index": i, "topic": "t"}}
+        for i in range(args.chunks)
+    ])
+
+    rng = np.random.default_rng(1)
+    questions = [f"what is topic number {i} about" for i in range(args.distinct)]
+    queries = [questions[i] for i in rng.integers(0, args.distinct, args.queries)]
+
+    # A zero-capacity cache never hits: every query is embedded
+    uncached = Retriever(embedder, store, cache=QueryEmbeddingCache(capacity=0))
+    cache = QueryEmbeddingCache()
+    cached = Retriever(embedder, store, cache=cache)
+    query_embedding = embedder.embed_text(questions[0])
+
+    print(f"{args.chunks} chunks, {args.queries} queries over {args.distinct} distinct questions")
+    print(f"  faiss search only   {percentiles(timed(lambda q: store.search(query_embedding, 3), queries))}")
+    print(f"  retrieve, no cache  {percentiles(timed(uncached.retrieve, queries))}")
+    print(f"  retrieve, cached    {percentiles(timed(cached.retrieve, queries))}")
+    print(f"  cache: {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
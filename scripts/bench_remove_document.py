@@ -0,0 +1,58 @@
+"""
+Times removing one document from a VectorStore against rebuilding the
+store from the remaining vectors (which still leaves out re-embedding).
+
+Usage: python scripts/bench_remove_document.py [--chunks 200000] [--doc-chunks 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.indexer import VectorStore
+
+DIMENSION = 384
+
+def build(vectors: np.ndarray, doc_chunks: int) -> VectorStore:
+    store = VectorStore(DIMENSION)
+    for start in range(0, len(vectors), doc_chunks):
+        source = f"doc_{start // doc_chunks}.pdf"
+        metadata = [
+            {"id": f"{source}_{i}", "text": "", "metadata": {"source": source, "chunk_index": i, "topic": source}}
+            for i in range(min(doc_chunks, len(vectors) - start))
+        ]
+        store.add_embeddings(vectors[start:start + len(metadata)], metadata)
+    return store
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--doc-chunks", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, DIMENSION), dtype=np.float32)
+    store = build(vectors, args.doc_chunks)
+    victim_index = len(store.documents) // 2
+    victim = f"doc_{victim_index}.pdf"
+
+    start = time.perf_counter()
+    removed = store.remove_document(victim)
+    remove_s = time.perf_counter() - start
+
+    # Rebuild: what the store had to do before chunks had ids
+    keep = np.ones(args.chunks, dtype=bool)
+    keep[victim_index * args.doc_chunks:victim_index * args.doc_chunks + removed] = False
+    start = time.perf_counter()
+    build(vectors[keep], args.doc_chunks)
+    rebuild_s = time.perf_counter() - start
+
+    print(f"{args.chunks} chunks, removed {removed} ({victim})")
+    print(f"remove_document: {remove_s * 1000:.1f} ms")
+    print(f"rebuild from vectors (no re-embedding): {rebuild_s * 1000:.1f} ms ({rebuild_s / remove_s:.0f}x slower)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Open time and memory of a saved VectorStore, read into RAM vs loaded with
+mmap=True. Builds a store of clustered synthetic chunks once (in --dir, if
+it doesn't exist yet), then opens it in fresh processes and reports the
+time to open, the time to the first answer, and resident memory after
+--queries searches: private (RssAnon, paid by every process) and
+file-backed (RssFile, page cache shared by all processes that map the
+store). Linux only (reads /proc/self/status).
+
+Usage: python scripts/bench_store_open.py [--chunks 1000000] [--compression sq8|pq|none] [--dir /tmp/edubuddy_bench_store]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.indexer import VectorStore
+
+DIMENSION = 384
+TOPICS = 2000
+BATCH = 50000
+
+def clustered(rng, count: int, centers: np.ndarray) -> np.ndarray:
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.06 * rng.standard_normal((count, DIMENSION))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype('float32')
+
+def build(directory: str, chunks: int, compression):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((TOPICS, DIMENSION)) / np.sqrt(DIMENSION)
+    store = VectorStore(DIMENSION, compression=compression)
+    for start in range(0, chunks, BATCH):
+        count = min(BATCH, chunks - start)
+        store.add_embeddings(clustered(rng, count, centers), [
+            {"id": str(start + i), "text": f"chunk {start + i} of a course document " * 8,
+             "metadata": {"source": f"doc_{(start + i) // 500}.pdf", "chunk_index": (start + i) % 500,
+                          "topic": f"Chapter {(start + i) % 40}"}}
+            for i in range(count)
+        ])
+    store.save(directory)
+
+def memory_mb() -> dict:
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('RssAnon', 'RssFile'):
+                fields[name] = int(value.split()[0]) / 1024
+    return fields
+
+def open_store(directory: str, mmap: bool, queries: int) -> dict:
+    """Runs in a fresh process: opens the store and answers queries."""
+    before = memory_mb()
+    start = time.perf_counter()
+    store = VectorStore()
+    store.load(directory, mmap=mmap)
+    opened = time.perf_counter() - start
+    rng = np.random.default_rng(1)
+    query_vectors = rng.standard_normal((queries, store.dimension)).astype('float32')
+    store.search(query_vectors[0], 5)
+    first = time.perf_counter() - start
+    for query in query_vectors[1:]:
+        store.search(query, 5)
+    after = memory_mb()
+    return {
+        'open': opened,
+        'first': first,
+        'anon': after['RssAnon'] - before['RssAnon'],
+        'file': after['RssFile'] - before['RssFile'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1000000)
+    parser.add_argument("--compression", default="sq8", choices=["sq8", "pq", "none"],
+                        help="a float32 store of 1M chunks needs about 5 GB of RAM to build")
+    parser.add_argument("--dir", default="/tmp/edubuddy_bench_store")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    compression = None if args.compression == "none" else args.compression
+    if not VectorStore().load(args.dir, mmap=True):
+        print(f"Building a {args.chunks}-chunk store in {args.dir} ...")
+        start = time.perf_counter()
+        build(args.dir, args.chunks, compression)
+        print(f"  built in {time.perf_counter() - start:.0f} s")
+    size = sum(os.path.getsize(os.path.join(args.dir, n)) for n in os.listdir(args.dir))
+    print(f"Store in {args.dir}: {size / 2**20:.0f} MB on disk")
+
+    # Each measurement in its own process, so nothing is left over from the last
+    context = multiprocessing.get_context('spawn')
+    print(f"{'load':<8} {'open s':>8} {'first s':>8} {'private MB':>11} {'shared MB':>10}")
+    for mmap in (False, True):
+        with context.Pool(1) as pool:
+            stats = pool.apply(open_store, (args.dir, mmap, args.queries))
+        print(f"{'mmap' if mmap else 'read':<8} {stats['open']:>8.2f} {stats['first']:>8.2f} "
+              f"{stats['anon']:>11.0f} {stats['file']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Peak resident memory of segmenting large .txt files, by file size.
+
+Each scenario runs in a fresh interpreter:
+  import  - importing the ingest modules (baseline)
+  read    - parse_text_file + extract_segments + chunk_text (whole file in memory)
+  stream  - iter_text_file -> iter_segments -> chunk spans, text discarded as it goes
+  store   - iter_text_file -> iter_segments -> iter_chunks into a DocumentStore
+            (what ingestion does; the store keeps one copy of the text for the chunks)
+
+Usage: python scripts/bench_text_reader.py [--sizes-mb 16 64 256]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IMPORTS = (
+    "from src.ingest.text_parser import parse_text_file, iter_text_file\n"
+    "from src.ingest.topic_extractor import TopicExtractor\n"
+    "from src.ingest.chunker import chunk_text, chunk_spans, iter_chunks\n"
+    "from src.ingest.chunk import DocumentStore\n"
+)
+
+SCENARIOS = {
+    "import": "",
+    "read": (
+        "segments = TopicExtractor().extract_segments(parse_text_file(path))\n"
+        "count = sum(len(chunk_text(s['content'])) for s in segments)"
+    ),
+    "stream": (
+        "count = 0\n"
+        "for _, _, piece in TopicExtractor().iter_segments(iter_text_file(path)):\n"
+        "    count += len(chunk_spans(len(piece)))"
+    ),
+    "store": (
+        "count = sum(1 for _ in iter_chunks(DocumentStore(), path,\n"
+        "            TopicExtractor().iter_segments(iter_text_file(path), 'log')))"
+    ),
+}
+
+PROBE = """
+import json, resource, sys
+sys.path.insert(0, {root!r})
+path = {path!r}
+{imports}
+{code}
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{'peak_mb': peak_mb}}))
+"""
+
+LOG_LINE = "2024-03-01 12:00:{sec:02d} INFO worker-{worker} processed batch {n} in 35 ms (queue depth 12)\n"
+
+def generate_log(path: str, size_mb: int):
+    target = size_mb * 1024 * 1024
+    written = 0
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            if n % 20000 == 0:
+                block = f"Section {n // 20000 + 1}: Run log\n"
+            else:
+                block = ""
+            block += "".join(LOG_LINE.format(sec=i % 60, worker=i % 8, n=n + i) for i in range(1000))
+            f.write(block)
+            written += len(block)
+            n += 1000
+
+def run(path: str, code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=ROOT, path=path, imports=IMPORTS, code=code)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+
+    print(f"{'file MB':>8} " + " ".join(f"{name + ' MB':>10}" for name in SCENARIOS))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp, f"log_{size_mb}.txt")
+            generate_log(path, size_mb)
+            cells = []
+            for code in SCENARIOS.values():
+                stats = run(path, code)
+                cells.append("error" if "error" in stats else f"{stats['peak_mb']:.0f}")
+            print(f"{size_mb:>8} " + " ".join(f"{cell:>10}" for cell in cells))
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmarks TopicExtractor segmentation on a synthetic book, with and
+without a table of contents.
+
+Usage: python scripts/bench_topic_extractor.py [--pages 2000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ingest.topic_extractor import TopicExtractor
+
+PARAGRAPH = (
+    "Machine learning is a field of study in artificial intelligence concerned with\n"
+    "the development of statistical algorithms that can learn from data and generalize\n"
+    "to unseen data, and thus perform tasks without explicit instructions.\n"
+)
+LINES_PER_PAGE = 45
+PAGES_PER_CHAPTER = 80
+
+def generate_book(pages: int, with_toc: bool) -> list:
+    """Returns the book as a list of page texts."""
+    chapters = (pages + PAGES_PER_CHAPTER - 1) // PAGES_PER_CHAPTER
+    book = []
+    if with_toc:
+        toc = ["Table of Contents\n"]
+        for c in range(chapters):
+            toc.append(f"Chapter {c + 1}: Topic {c + 1} . . . . . {c * PAGES_PER_CHAPTER + 1}\n")
+        book.append("".join(toc))
+    body = PARAGRAPH * (LINES_PER_PAGE // 3)
+    for page in range(pages):
+        parts = []
+        if page % PAGES_PER_CHAPTER == 0:
+            c = page // PAGES_PER_CHAPTER
+            parts.append(f"Chapter {c + 1}: Topic {c + 1}\n")
+        if page % 10 == 5:
+            parts.append(f"{page % 9 + 1}. Worked Example\n")
+        parts.append(f"Page {page + 1}\n")
+        parts.append(body)
+        book.append("".join(parts))
+    return book
+
+def time_it(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    extractor = TopicExtractor()
+    for with_toc in (False, True):
+        pages = generate_book(args.pages, with_toc)
+        text = "\n".join(pages)
+        label = "with TOC" if with_toc else "no TOC"
+        segments = extractor.extract_segments(text)
+        batch_s = time_it(lambda: extractor.extract_segments(text), args.repeat)
+        stream_s = time_it(lambda: sum(1 for _ in extractor.iter_segments(pages)), args.repeat)
+        print(f"{args.pages} pages {label} ({len(text) / 1e6:.1f}M chars, {len(segments)} segments): "
+              f"extract_segments {batch_s:.3f}s, iter_segments {stream_s:.3f}s")
+
+if __name__ == "__main__":
+    main()
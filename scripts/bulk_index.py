@@ -0,0 +1,77 @@
+"""
+Offline bulk indexing of a course library: parses every supported file
+under the given paths and embeds the chunks with a pool of worker
+processes, then saves the vector store. Documents are named by their
+path relative to the folder holding the given paths.
+
+Usage: python scripts/bulk_index.py PATH [PATH ...] [--out edubuddy_index] [--workers N] [--backend torch|onnx] [--onnx-dir DIR] [--compression sq8|pq]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ingest.ingestor import Ingestor
+from src.embed.embedding_pool import EmbeddingPool, default_workers, SHARD_SIZE
+from src.embed.embedding_cache import EmbeddingCache
+from src.embed.indexer import VectorStore
+
+EXTENSIONS = {'.pdf', '.docx', '.txt', '.md', '.png', '.jpg', '.jpeg', '.mp4', '.avi'}
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names)
+                             if os.path.splitext(n)[1].lower() in EXTENSIONS)
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+def library_root(paths) -> str:
+    """
+    Directory documents are named relative to: the one holding all given
+    paths, so week1/notes.txt and week2/notes.txt stay two documents.
+    """
+    return os.path.commonpath([os.path.abspath(p if os.path.isdir(p) else os.path.dirname(p) or '.')
+                               for p in paths])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--out", default="edubuddy_index")
+    parser.add_argument("--workers", type=int, default=None, help="embedding processes (default: by cores and memory)")
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx"])
+    parser.add_argument("--onnx-dir", default=None, help="int8 export for --backend onnx")
+    parser.add_argument("--compression", default=None, choices=["sq8", "pq"],
+                        help="store large indexes compressed (float16 copy kept on disk for re-ranking)")
+    parser.add_argument("--no-cache", action="store_true", help="don't use the persistent embedding cache")
+    args = parser.parse_args()
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No supported files found.")
+        return
+    workers = args.workers or default_workers(args.backend)
+    print(f"Indexing {len(files)} file(s) with {workers} embedding worker(s)")
+
+    store = VectorStore(compression=args.compression)
+    if os.path.isdir(args.out) and store.load(args.out):
+        print(f"Updating the existing index in {args.out} ({len(store)} chunks)")
+    cache = None if args.no_cache else EmbeddingCache()
+
+    start = time.perf_counter()
+    with EmbeddingPool(workers=workers, backend=args.backend, onnx_dir=args.onnx_dir, cache=cache) as pool:
+        # Batches of a few shards per worker keep every worker busy
+        ingestor = Ingestor(workers=workers, root=library_root(args.paths))
+        total = ingestor.ingest_into(files, pool, store, batch_size=SHARD_SIZE * workers * 2)
+    elapsed = time.perf_counter() - start
+
+    store.save(args.out)
+    print(f"Indexed {total} chunks in {elapsed:.1f} s ({total / max(elapsed, 1e-9):.0f} chunks/s); saved to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Exports the sentence-transformer used by Embedder to ONNX, quantizes its
+weights to int8 and checks that the result stays within COSINE_TOLERANCE
+of the torch embeddings, so existing indexes keep working.
+
+Needs torch, transformers, sentence-transformers, onnx, onnxruntime and
+tokenizers; only onnxruntime and tokenizers are needed to run the export.
+
+Usage: python scripts/export_onnx_embedder.py [--model all-MiniLM-L6-v2] [--out DIR]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from src.embed.onnx_backend import (
+    OnnxEncoder, ONNX_MODEL_FILE, MAX_SEQ_LENGTH, COSINE_TOLERANCE, cosine_agreement, default_model_dir
+)
+
+SAMPLE_TEXTS = [
+    "What is machine learning?",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "Chapter 3: Newton's laws of motion describe the relationship between a body and the forces acting on it.",
+    "x = 5",
+    "The French Revolution began in 1789 and reshaped European politics for decades. " * 8,
+]
+
+def export(model_name: str, out_dir: str):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    hub_name = model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name).eval()
+    os.makedirs(out_dir, exist_ok=True)
+    # Writes tokenizer.json, which OnnxEncoder loads with the tokenizers library
+    tokenizer.save_pretrained(out_dir)
+
+    inputs = tokenizer(SAMPLE_TEXTS[:2], padding=True, truncation=True,
+                       max_length=MAX_SEQ_LENGTH, return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in inputs]
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = os.path.join(tmp, "model.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                model, tuple(inputs[name] for name in names), fp32_path,
+                input_names=names, output_names=["last_hidden_state"],
+                dynamic_axes=dynamic, opset_version=14
+            )
+        quantize_dynamic(fp32_path, os.path.join(out_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--out", default=None, help="export directory (default: where Embedder looks)")
+    args = parser.parse_args()
+    out_dir = args.out or default_model_dir(args.model)
+
+    export(args.model, out_dir)
+
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(args.model).encode(SAMPLE_TEXTS)
+    candidate = OnnxEncoder(out_dir).encode(SAMPLE_TEXTS)
+    agreement = cosine_agreement(np.asarray(reference), candidate)
+    print(f"Exported {args.model} to {out_dir}")
+    print(f"Lowest cosine similarity to torch on {len(SAMPLE_TEXTS)} samples: {agreement:.4f} "
+          f"(tolerance {COSINE_TOLERANCE})")
+    if agreement < COSINE_TOLERANCE:
+        print("The quantized model drifts too far from the torch one; do not use it with existing indexes.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
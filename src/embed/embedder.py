@@ -1,10 +1,110 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Optional, Callable
 import numpy as np
+from .embedding_cache import EmbeddingCache
+from .onnx_backend import OnnxEncoder, default_model_dir
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Embedding backends: PyTorch sentence-transformers, or the int8 ONNX export of the same model
+BACKENDS = ('torch', 'onnx')
+
+# Padded tokens per encode batch when batching by length (32 x 256-token chunks)
+TOKEN_BUDGET = 32 * 256
+# Upper bound on items per batch, however short they are
+MAX_BATCH_ITEMS = 256
+# Rough characters per token, to estimate lengths without tokenizing twice
+CHARS_PER_TOKEN = 4
+
+def length_batches(lengths: List[int], token_budget: int = TOKEN_BUDGET,
+                   max_items: int = MAX_BATCH_ITEMS) -> List[List[int]]:
+    """
+    Groups item indices into batches of similar length: items are bucketed
+    by the power of two above their length, and each bucket is cut into
+    batches whose padded size (items x longest item) fits `token_budget`.
+    """
+    buckets = {}
+    for i in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        buckets.setdefault(max(lengths[i], 1).bit_length(), []).append(i)
+
+    batches = []
+    for _, indices in sorted(buckets.items(), reverse=True):
+        start = 0
+        while start < len(indices):
+            # Sorted longest first, so the first item sets the padded length
+            size = max(1, min(max_items, token_budget // max(lengths[indices[start]], 1)))
+            batches.append(indices[start:start + size])
+            start += size
+    return batches
+
+def cache_model_name(model_name: str, backend: str = 'torch') -> str:
+    """Name embeddings are cached under; int8 vectors are close to, not equal to, the torch ones."""
+    return f"{model_name}/onnx-int8" if backend == 'onnx' else model_name
+
+def tokenizer_lowercases(model) -> bool:
+    """
+    True if the model's tokenizer lowercases its input (BERT-style uncased
+    models such as all-MiniLM-L6-v2), so texts differing only in case embed
+    the same. False if it can't tell.
+    """
+    lowercases = getattr(model, 'lowercases_input', None)  # OnnxEncoder
+    if lowercases is not None:
+        return lowercases
+    return bool(getattr(getattr(model, 'tokenizer', None), 'do_lower_case', False))
+
+def embed_with_cache(cache: Optional[EmbeddingCache], model_name: str, texts: List[str],
+                     encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+    """
+    Embeds texts with `encode`, except for those `cache` already holds.
+    New embeddings are added to the cache.
+    """
+    if cache is None:
+        return encode(texts)
+
+    found, misses = cache.get_many(model_name, texts)
+    if not misses:
+        return np.stack([found[i] for i in range(len(texts))]) if texts else np.zeros((0, 0), dtype=np.float32)
+
+    encoded = np.asarray(encode([texts[i] for i in misses]), dtype=np.float32)
+    cache.put_many(model_name, [texts[i] for i in misses], encoded)
+
+    embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+    embeddings[misses] = encoded
+    for i, vector in found.items():
+        embeddings[i] = vector
+    return embeddings
 
 class Embedder:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', cache: EmbeddingCache = None,
+                 length_bucketing: bool = True, backend: str = 'torch', onnx_dir: str = None,
+                 threads: int = None):
+        """
+        cache: optional EmbeddingCache; chunks embedded before (by any
+        session) are read from it instead of being encoded again.
+        length_bucketing: batch chunks of similar length together, sized by
+        TOKEN_BUDGET, instead of 32 at a time in input order.
+        backend: 'torch', or 'onnx' to run the int8 export found in `onnx_dir`
+        (default: default_model_dir(model_name)).
+        threads: intra-op threads for the model (default: the backend's own).
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        if backend == 'onnx':
+            self.model = OnnxEncoder(onnx_dir or default_model_dir(model_name), threads)
+        else:
+            if SentenceTransformer is None:
+                raise ImportError("The torch backend needs sentence-transformers (pip install sentence-transformers).")
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            self.model = SentenceTransformer(model_name)
+        self.model_name = cache_model_name(model_name, backend)
+        self.lowercases_input = tokenizer_lowercases(self.model)
+        self.cache = cache
+        self.length_bucketing = length_bucketing
 
     def embed_text(self, text: str) -> np.ndarray:
         """
@@ -15,5 +115,24 @@ class Embedder:
     def embed_chunks(self, chunks: List[str]) -> np.ndarray:
         """
         Embeds a list of strings.
+        With a cache, only the strings it doesn't hold are encoded.
         """
-        return self.model.encode(chunks, batch_size=32, show_progress_bar=True)
+        return embed_with_cache(self.cache, self.model_name, chunks, self._encode)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Estimated token counts, capped at what the model reads."""
+        max_tokens = getattr(self.model, 'max_seq_length', None) or 512
+        return [min(len(t) // CHARS_PER_TOKEN + 2, max_tokens) for t in texts]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not self.length_bucketing or len(texts) <= 1:
+            return self.model.encode(texts, batch_size=32, show_progress_bar=True)
+
+        embeddings = None
+        for batch in length_batches(self.token_lengths(texts)):
+            encoded = self.model.encode([texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), encoded.shape[1]), dtype=encoded.dtype)
+            # Back to input order
+            embeddings[batch] = encoded
+        return embeddings
@@ -0,0 +1,247 @@
+import sqlite3
+import hashlib
+import datetime
+import os
+import threading
+import unicodedata
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys: NFC with runs of whitespace
+    collapsed, which the sentence-transformer tokenizers ignore anyway.
+    """
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """
+    Persistent cache of chunk embeddings keyed by (model_name, normalized text hash).
+    Vectors live in one memory-mapped matrix per model (float16 by default)
+    and a SQLite table maps keys to matrix rows. Each model keeps at most
+    `max_entries` vectors; the least recently used rows are reused once full.
+    """
+    def __init__(self, cache_dir: str = "edubuddy_embedding_cache", max_entries: int = 100000,
+                 dtype=np.float16):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, "index.db")
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self._matrices = {}  # model_name -> np.memmap
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=20)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS models (
+                model TEXT PRIMARY KEY,
+                dimension INTEGER,
+                file TEXT
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT,
+                text_hash TEXT,
+                slot INTEGER,
+                last_access TEXT,
+                PRIMARY KEY (model, text_hash)
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings (model, last_access)')
+        conn.commit()
+        conn.close()
+
+    def _matrix(self, c, model_name: str, dimension: int = None) -> Optional[np.memmap]:
+        """Opens (or, given a dimension, creates) the vector matrix of a model."""
+        matrix = self._matrices.get(model_name)
+        if matrix is not None:
+            return matrix
+        c.execute('SELECT dimension, file FROM models WHERE model = ?', (model_name,))
+        row = c.fetchone()
+        if row is None:
+            if dimension is None:
+                return None
+            file_name = hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:16] + ".vectors"
+            c.execute('INSERT INTO models (model, dimension, file) VALUES (?, ?, ?)',
+                      (model_name, dimension, file_name))
+            row = (dimension, file_name)
+        dimension, file_name = row
+        # The matrix file is per dtype, so switching dtype starts a fresh matrix
+        path = os.path.join(self.cache_dir, f"{file_name}.{self.dtype.name}")
+        if not os.path.exists(path):
+            c.execute('DELETE FROM embeddings WHERE model = ?', (model_name,))
+        # Size the file for max_entries; rows beyond a smaller limit are forgotten
+        with open(path, 'ab') as f:
+            f.truncate(self.max_entries * dimension * self.dtype.itemsize)
+        c.execute('DELETE FROM embeddings WHERE model = ? AND slot >= ?', (model_name, self.max_entries))
+        c.connection.commit()
+        matrix = np.memmap(path, dtype=self.dtype, mode='r+', shape=(self.max_entries, dimension))
+        self._matrices[model_name] = matrix
+        return matrix
+
+    def _lookup_slots(self, c, model_name: str, keys: List[str]) -> Dict[str, int]:
+        """Matrix rows of the cached keys among `keys`."""
+        slots = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            c.execute(
+                f'SELECT text_hash, slot FROM embeddings WHERE model = ? AND text_hash IN ({",".join("?" * len(part))})',
+                [model_name] + part
+            )
+            slots.update(c.fetchall())
+        return slots
+
+    def get_many(self, model_name: str, texts: List[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """
+        Looks up embeddings for texts.
+        Returns ({index: float32 vector} for hits, [indices of misses]).
+        """
+        keys = [text_hash(t) for t in texts]
+        found = {}
+        try:
+            with self._lock:
+                conn = sqlite3.connect(self.db_path, timeout=20)
+                c = conn.cursor()
+                matrix = self._matrix(c, model_name)
+                if matrix is not None:
+                    slots = self._lookup_slots(c, model_name, list(set(keys)))
+                    now = self._now()
+                    c.executemany('UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?',
+                                  [(now, model_name, key) for key in slots])
+                    conn.commit()
+                    for i, key in enumerate(keys):
+                        slot = slots.get(key)
+                        if slot is not None:
+                            found[i] = np.asarray(matrix[slot], dtype=np.float32)
+                conn.close()
+        except Exception as e:
+            print(f"Error reading embedding cache: {e}")
+            found = {}
+
+        misses = [i for i in range(len(texts)) if i not in found]
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(misses)
+        return found, misses
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray):
+        """Stores embeddings for texts, evicting least recently used rows if full."""
+        if not len(texts):
+            return
+        # Later duplicates would just overwrite earlier ones
+        entries = dict(zip((text_hash(t) for t in texts), vectors))
+        try:
+            with self._lock:
+                conn = sqlite3.connect(self.db_path, timeout=20)
+                c = conn.cursor()
+                matrix = self._matrix(c, model_name, len(vectors[0]))
+                if matrix.shape[1] != len(vectors[0]):
+                    raise ValueError(f"cached dimension {matrix.shape[1]} != {len(vectors[0])}")
+
+                keys = list(entries)[:self.max_entries]
+                slots = self._allocate(c, model_name, keys)
+                now = self._now()
+                for key, slot in zip(keys, slots):
+                    matrix[slot] = entries[key]
+                matrix.flush()
+                c.executemany('''
+                    INSERT OR REPLACE INTO embeddings (model, text_hash, slot, last_access)
+                    VALUES (?, ?, ?, ?)
+                ''', [(model_name, key, slot, now) for key, slot in zip(keys, slots)])
+                conn.commit()
+                conn.close()
+        except Exception as e:
+            print(f"Error writing embedding cache: {e}")
+
+    def _allocate(self, c, model_name: str, keys: List[str]) -> List[int]:
+        """Matrix rows for keys: their current row, a free row, or a least recently used one."""
+        slots = self._lookup_slots(c, model_name, keys)
+        new_keys = [key for key in keys if key not in slots]
+
+        c.execute('SELECT COUNT(*), COALESCE(MAX(slot), -1) FROM embeddings WHERE model = ?', (model_name,))
+        count, max_slot = c.fetchone()
+        free = []
+        if count == max_slot + 1:
+            # Rows are packed: the free ones are at the end
+            free = list(range(count, min(self.max_entries, count + len(new_keys))))
+        else:
+            c.execute('SELECT slot FROM embeddings WHERE model = ?', (model_name,))
+            used = {row[0] for row in c.fetchall()}
+            free = [slot for slot in range(self.max_entries) if slot not in used][:len(new_keys)]
+
+        needed = len(new_keys) - len(free)
+        if needed > 0:
+            c.execute('''
+                SELECT text_hash, slot FROM embeddings WHERE model = ?
+                ORDER BY last_access ASC LIMIT ?
+            ''', (model_name, needed + len(slots)))
+            keep = set(slots)
+            stale = [(key, slot) for key, slot in c.fetchall() if key not in keep][:needed]
+            c.executemany('DELETE FROM embeddings WHERE model = ? AND text_hash = ?',
+                          [(model_name, key) for key, _ in stale])
+            free.extend(slot for _, slot in stale)
+
+        for key, slot in zip(new_keys, free):
+            slots[key] = slot
+        return [slots[key] for key in keys]
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus the number of cached vectors."""
+        entries = 0
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20)
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*) FROM embeddings')
+            entries = c.fetchone()[0]
+            conn.close()
+        except Exception as e:
+            print(f"Error getting embedding cache stats: {e}")
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "entries": entries
+        }
+
+    def clear(self) -> bool:
+        """Deletes every cached embedding."""
+        try:
+            with self._lock:
+                conn = sqlite3.connect(self.db_path, timeout=20)
+                c = conn.cursor()
+                c.execute('SELECT file FROM models')
+                files = [row[0] for row in c.fetchall()]
+                c.execute('DELETE FROM embeddings')
+                c.execute('DELETE FROM models')
+                conn.commit()
+                c.execute('VACUUM')
+                conn.close()
+                self._matrices = {}
+                for file_name in files:
+                    path = os.path.join(self.cache_dir, f"{file_name}.{self.dtype.name}")
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.hits = 0
+                self.misses = 0
+            return True
+        except Exception as e:
+            print(f"Error clearing embedding cache: {e}")
+            return False
+
+    def _now(self) -> str:
+        # Microsecond resolution keeps LRU order stable for back-to-back accesses
+        return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
@@ -0,0 +1,120 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import numpy as np
+from .embedder import Embedder, cache_model_name, embed_with_cache
+from .embedding_cache import EmbeddingCache
+
+# Resident memory of one worker with its model loaded, by backend
+WORKER_MEMORY_MB = {'torch': 700, 'onnx': 250}
+# Share of the currently available memory the pool may use
+MEMORY_SHARE = 0.5
+# Chunks sent to a worker per task; large enough to amortize the transfer
+SHARD_SIZE = 512
+
+# The model of a worker process, loaded once by _init_worker
+_worker_embedder = None
+
+def available_memory_mb() -> Optional[float]:
+    """Memory the OS can hand out without swapping, or None if unknown."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def default_workers(backend: str = 'torch') -> int:
+    """
+    Worker count for a bulk run: one core is left for the app (the
+    generator shares the machine), and the model copies together may use
+    at most MEMORY_SHARE of the available memory.
+    """
+    workers = max(1, (os.cpu_count() or 1) - 1)
+    memory = available_memory_mb()
+    if memory is not None:
+        workers = min(workers, int(memory * MEMORY_SHARE // WORKER_MEMORY_MB.get(backend, 700)))
+    return max(1, workers)
+
+def _init_worker(model_name: str, backend: str, onnx_dir: Optional[str], threads: int):
+    global _worker_embedder
+    _worker_embedder = Embedder(model_name, backend=backend, onnx_dir=onnx_dir, threads=threads)
+
+def _embed_shard(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embedder.embed_chunks(texts), dtype=np.float32)
+
+class EmbeddingPool:
+    """
+    Bulk embedding across worker processes, each with its own model copy.
+    Chunk lists are split into shards of SHARD_SIZE that the workers embed
+    in parallel; results come back in input order. Has Embedder's
+    embed_chunks/embed_text, so it can be passed to Ingestor.ingest_into.
+
+    Meant for offline/bulk ingestion; the interactive app keeps a single
+    Embedder. Use as a context manager (or call close()) so the workers
+    are shut down.
+    """
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', workers: int = None,
+                 backend: str = 'torch', onnx_dir: str = None, cache: EmbeddingCache = None,
+                 shard_size: int = SHARD_SIZE):
+        self.workers = workers or default_workers(backend)
+        self.model_name = cache_model_name(model_name, backend)
+        self.cache = cache
+        self.shard_size = shard_size
+        # Cores are split between workers instead of every model using all of them
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # spawn: forking a process that already runs torch threads can deadlock
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_name, backend, onnx_dir, threads)
+        )
+
+    def embed_chunks(self, chunks: List[str]) -> np.ndarray:
+        """
+        Embeds a list of strings across the workers.
+        With a cache, only the strings it doesn't hold are encoded.
+        """
+        return embed_with_cache(self.cache, self.model_name, chunks, self._encode)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_chunks([text])[0]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self._pool is None:
+            raise RuntimeError("EmbeddingPool is closed")
+        futures = [self._pool.submit(_embed_shard, texts[start:start + self.shard_size])
+                   for start in range(0, len(texts), self.shard_size)]
+        try:
+            shards = [future.result() for future in futures]
+        except BaseException:
+            # Don't leave the remaining shards running after a failure or Ctrl+C
+            for future in futures:
+                future.cancel()
+            raise
+        return np.concatenate(shards) if shards else np.zeros((0, 0), dtype=np.float32)
+
+    def close(self):
+        """Stops the workers, dropping shards that have not started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -1,61 +1,453 @@
 import faiss
 import numpy as np
 import pickle
+import json
 import os
-from typing import List, Dict, Tuple
+import threading
+from typing import List, Dict, Tuple, Optional
+from .vector_file import VectorFile
+from .metadata_store import ChunkTable, ChunkView, ChunkRecord
+
+# Chunks at which the exact (flat) index is swapped for an IVF index
+ANN_THRESHOLD = 50000
+# Inverted lists probed per query; higher is more accurate and slower
+DEFAULT_NPROBE = 32
+# Training points per inverted list (faiss wants at least 39)
+TRAIN_POINTS_PER_LIST = 40
+# The IVF index is retrained once the store is this many times larger than at training
+RETRAIN_GROWTH = 4
+# Compressed storage for IVF indexes: 'sq8' (1 byte per dimension) or 'pq'
+COMPRESSIONS = ('sq8', 'pq')
+# Product quantizer: dimensions per 8-bit sub-vector code (48 bytes per 384-d chunk)
+PQ_DIMS_PER_CODE = 8
+# Training points the product quantizer needs (39 x its 256 centroids)
+PQ_TRAIN_POINTS = 10000
+# Candidates fetched from a compressed index per result, re-ranked exactly
+RERANK_FACTOR = 4
+# Search filters selecting at most this share of an IVF store probe every list;
+# faiss checks the id selector before computing a distance, so this stays cheap
+FILTER_PROBE_ALL_SHARE = 0.05
+# Float16 copy of the vectors kept next to a compressed index
+VECTOR_FILE = "vectors.f16"
+# faiss read flag that maps flat and IVF codes from the file (faiss >= 1.10)
+MMAP_FLAG = getattr(faiss, 'IO_FLAG_MMAP_IFC', None)
+
+def ivf_list_count(num_vectors: int) -> int:
+    """Inverted lists for an IVF index over num_vectors (about sqrt(n))."""
+    # Every list needs enough points to train on
+    return max(1, min(int(np.sqrt(num_vectors)), num_vectors // 39))
+
+def pq_subquantizers(dimension: int) -> int:
+    """Sub-vectors for a product quantizer; faiss needs them to divide the dimension."""
+    m = max(1, dimension // PQ_DIMS_PER_CODE)
+    while dimension % m:
+        m -= 1
+    return m
 
 class VectorStore:
-    def __init__(self, dimension: int = 384):
+    """
+    FAISS index of chunk embeddings plus the chunks themselves.
+    Every chunk gets a stable 64-bit id, so single documents can be removed
+    or replaced without rebuilding the index.
+    Small stores use an exact flat index. Once a store reaches
+    `ann_threshold` chunks it is moved, while adding, to an IVF index
+    trained on a sample of its vectors (searched with `nprobe` lists), and
+    the IVF index is retrained as the store keeps growing.
+    IVF rather than HNSW because faiss HNSW indexes cannot remove vectors.
+
+    compression ('sq8' or 'pq') stores the IVF index compressed instead of
+    as float32. A float16 copy of the vectors is then kept on disk (not in
+    RAM): it is used to retrain, and with `rerank` the top candidates of a
+    search are re-ranked from it by exact distance.
+    """
+    def __init__(self, dimension: int = 384, ann_threshold: int = ANN_THRESHOLD,
+                 nprobe: int = DEFAULT_NPROBE, compression: Optional[str] = None, rerank: bool = True):
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)
-        self.metadata: List[Dict] = []
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        self.compression = compression
+        self.rerank = rerank
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+        self.vector_file = VectorFile(dimension) if compression else None
+        # Vectors the IVF index was trained for; 0 while the index is flat
+        self._trained_size = 0
+        # True while the index is memory-mapped from a saved file (read-only)
+        self._mapped = False
+        # Chunk text and metadata, column-wise, one row per chunk id
+        self.table = ChunkTable()
+        # Per-document bookkeeping: source -> {'digest': file hash or None}
+        self.documents: Dict[str, Dict] = {}
+        # (source, topic) -> (faiss id selector, chunk count) of search filters; cleared on changes
+        self._selectors: Dict[Tuple, Tuple] = {}
+        self._next_id = 0
+        # Guards index/metadata so searches can run while ingestion is still adding
+        self._lock = threading.RLock()
+
+    @property
+    def metadata(self) -> ChunkView:
+        """All indexed chunks, in insertion order, as a lazy sequence of ChunkRecords."""
+        with self._lock:
+            return self.table.view()
+
+    def chunks_where(self, source: Optional[str] = None, topic: Optional[str] = None) -> ChunkView:
+        """Indexed chunks of a source and/or topic, selected on the integer-coded columns."""
+        with self._lock:
+            return self.table.view(self.table.rows(source=source, topic=topic))
 
-    def add_embeddings(self, embeddings: np.ndarray, metadata: List[Dict]):
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def add_embeddings(self, embeddings: np.ndarray, metadata: List[Dict]) -> List[int]:
         """
         Adds embeddings and corresponding metadata to the index.
+        The store grows in place; chunks are recorded under their source.
+        Returns the ids assigned to the chunks.
         """
         if len(embeddings) != len(metadata):
             raise ValueError("Number of embeddings and metadata items must match.")
-        
-        self.index.add(np.array(embeddings).astype('float32'))
-        self.metadata.extend(metadata)
 
-    def search(self, query_embedding: np.ndarray, k: int = 5) -> List[Tuple[Dict, float]]:
+        with self._lock:
+            ids = np.arange(self._next_id, self._next_id + len(metadata), dtype='int64')
+            embeddings = np.array(embeddings).astype('float32')
+            self._unmap_index()
+            self.index.add_with_ids(embeddings, ids)
+            if self.vector_file is not None:
+                self.vector_file.write(ids, embeddings)
+            self._next_id += len(metadata)
+            self._track(ids.tolist(), metadata)
+            self._maybe_rebuild()
+            return ids.tolist()
+
+    @property
+    def index_type(self) -> str:
+        return 'ivf' if isinstance(self.index, faiss.IndexIVF) else 'flat'
+
+    def _unmap_index(self):
+        """Swaps a memory-mapped index for an in-memory copy before it is modified."""
+        # faiss aborts the process on writes to mapped codes, so this must come first
+        if self._mapped:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self._mapped = False
+
+    def _maybe_rebuild(self):
+        """Moves to a (re)trained IVF index when the store has outgrown its index."""
+        ntotal = self.index.ntotal
+        if self._trained_size:
+            if ntotal >= RETRAIN_GROWTH * self._trained_size:
+                self._build_ivf()
+        elif ntotal >= self.ann_threshold:
+            self._build_ivf()
+
+    def _build_ivf(self, seed: int = 0):
+        ids, vectors = self._stored_vectors()
+        nlist = ivf_list_count(len(vectors))
+        sample_size = nlist * TRAIN_POINTS_PER_LIST
+        quantizer = faiss.IndexFlatL2(self.dimension)
+        if self.compression == 'sq8':
+            index = faiss.IndexIVFScalarQuantizer(quantizer, self.dimension, nlist, faiss.ScalarQuantizer.QT_8bit)
+        elif self.compression == 'pq':
+            index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, pq_subquantizers(self.dimension), 8)
+            sample_size = max(sample_size, PQ_TRAIN_POINTS)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
+        sample_size = min(len(vectors), sample_size)
+        sample = vectors[np.random.default_rng(seed).choice(len(vectors), sample_size, replace=False)]
+
+        index.train(sample)
+        index.add_with_ids(vectors, ids)
+        index.nprobe = self.nprobe
+        print(f"Vector store: moved {len(vectors)} chunks to an IVF index "
+              f"({nlist} lists, {self.compression or 'float32'})")
+        self.index = index
+        self._mapped = False
+        self._trained_size = len(vectors)
+
+    def _stored_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, vectors) of everything in the index, in no particular order."""
+        if isinstance(self.index, faiss.IndexIVF):
+            invlists = self.index.invlists
+            ids, codes = [], []
+            flat = isinstance(self.index, faiss.IndexIVFFlat)
+            for list_no in range(invlists.nlist):
+                size = invlists.list_size(list_no)
+                if size:
+                    ids.append(faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy())
+                    if flat:
+                        codes.append(faiss.rev_swig_ptr(invlists.get_codes(list_no), size * invlists.code_size).copy())
+            if not ids:
+                return np.zeros(0, dtype='int64'), np.zeros((0, self.dimension), dtype='float32')
+            ids = np.concatenate(ids)
+            if not flat:
+                if self.vector_file is None:
+                    # Only the lossy codes are left
+                    self._unmap_index()
+                    self.index.set_direct_map_type(faiss.DirectMap.Hashtable)
+                    return ids, self.index.reconstruct_batch(ids)
+                # Compressed codes are lossy; the float16 copy is closer
+                return ids, self.vector_file.read(ids)
+            # IVFFlat codes are the raw float32 vectors
+            return ids, np.concatenate(codes).view('float32').reshape(-1, self.dimension)
+        ids = faiss.vector_to_array(self.index.id_map)
+        return ids, self.index.index.reconstruct_n(0, self.index.ntotal)
+
+    def _track(self, ids: List[int], metadata: List[Dict]):
+        self._selectors.clear()
+        rows = self.table.append(ids, metadata)
+        for code in np.unique(self.table.source_codes[rows]):
+            self.documents.setdefault(self.table.sources[code], {'digest': None})
+
+    def _drop_chunks(self, ids):
+        """Removes chunks from the index and the table (not from documents)."""
+        ids = np.asarray(ids, dtype='int64')
+        if len(ids):
+            self._unmap_index()
+            self._selectors.clear()
+            self.index.remove_ids(faiss.IDSelectorBatch(ids))
+            self.table.remove(self.table.rows_of(ids))
+
+    def remove_document(self, source: str) -> int:
+        """
+        Removes all chunks of `source` from the index and metadata.
+        Returns the number of chunks removed.
+        """
+        with self._lock:
+            if self.documents.pop(source, None) is None:
+                return 0
+            ids = self.table.ids[self.table.rows(source=source)]
+            self._drop_chunks(ids)
+            return len(ids)
+
+    def document_hashes(self, source: str) -> Dict[str, List[int]]:
+        """chunk_hash -> ids of the chunks of `source` with that text."""
+        with self._lock:
+            rows = self.table.rows(source=source)
+            hashes = {}
+            for chunk_id, content_hash in zip(self.table.ids[rows].tolist(), self.table.hashes[rows]):
+                hashes.setdefault(content_hash.tobytes().hex(), []).append(chunk_id)
+            return hashes
+
+    def revise_document(self, source: str, reused: Dict[int, Dict], vanished: List[int]):
+        """
+        Finishes re-indexing a new version of `source` whose changed chunks
+        were already added: `reused` maps ids of unchanged old chunks to
+        their new metadata (the stored embedding is kept), `vanished` are
+        old chunks with no counterpart, which are removed.
+        """
+        with self._lock:
+            if source not in self.documents:
+                return
+            if reused:
+                # Same text, new position/topic: the row is replaced, the vector kept
+                ids = np.array(list(reused), dtype='int64')
+                self._selectors.clear()
+                self.table.remove(self.table.rows_of(ids))
+                self.table.append(ids, list(reused.values()))
+            self._drop_chunks(vanished)
+
+    def replace_document(self, source: str, embeddings: np.ndarray, metadata: List[Dict],
+                         digest: Optional[str] = None) -> List[int]:
         """
-        Searches the index for the k nearest neighbors.
-        Returns a list of (metadata, distance) tuples.
+        Swaps the chunks of `source` for new ones in one step, so searches
+        never see the document missing or twice. Returns the new chunk ids.
+        """
+        with self._lock:
+            self.remove_document(source)
+            ids = self.add_embeddings(embeddings, metadata)
+            if digest is not None:
+                self.register_document(source, digest)
+            return ids
+
+    def has_document(self, source: str, digest: Optional[str] = None) -> bool:
+        """True if `source` is indexed (with content hash `digest`, if given)."""
+        with self._lock:
+            doc = self.documents.get(source)
+            return doc is not None and (digest is None or doc['digest'] == digest)
+
+    def register_document(self, source: str, digest: str):
+        """Records the content hash of an indexed document."""
+        with self._lock:
+            self.documents.setdefault(source, {'digest': None})['digest'] = digest
+
+    def document_ids(self, source: str) -> List[int]:
+        """Ids of the chunks of `source`."""
+        with self._lock:
+            return self.table.ids[self.table.rows(source=source)].tolist()
+
+    def topics(self) -> List[str]:
+        """Sorted topics of all indexed chunks."""
+        with self._lock:
+            return self.table.topic_names()
+
+    def search(self, query_embedding: np.ndarray, k: int = 5, source: Optional[str] = None,
+               topic: Optional[str] = None) -> List[Tuple[ChunkRecord, float]]:
+        """
+        Searches the index for the k nearest neighbors, optionally only
+        among the chunks of a source and/or topic.
+        Returns a list of (chunk record, distance) tuples.
         """
         query_embedding = np.array([query_embedding]).astype('float32')
-        distances, indices = self.index.search(query_embedding, k)
-        
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx != -1 and idx < len(self.metadata):
-                results.append((self.metadata[idx], float(distances[0][i])))
-        
+        with self._lock:
+            selector, selected = None, len(self.table)
+            if source is not None or topic is not None:
+                selector, selected = self._selector(source, topic)
+                if not selected:
+                    return []
+            search = self._search_reranked if self._reranks() else self._search_index
+            nprobe = None
+            if selector is not None and isinstance(self.index, faiss.IndexIVF) \
+                    and selected <= FILTER_PROBE_ALL_SHARE * len(self.table):
+                # The nearest lists hold few chunks of a small selection
+                nprobe = self.index.nlist
+            distances, indices = search(query_embedding, k, selector, nprobe)
+            if selector is not None and nprobe is None and isinstance(self.index, faiss.IndexIVF) \
+                    and (indices[0] != -1).sum() < min(k, selected):
+                # Too few chunks of the selection in the probed lists: probe them all
+                distances, indices = search(query_embedding, k, selector, self.index.nlist)
+
+            results = []
+            rows = self.table.rows_of(indices[0])
+            for row, distance in zip(rows.tolist(), distances[0].tolist()):
+                if row >= 0:
+                    results.append((self.table.record(row), float(distance)))
+
         return results
 
+    def _selector(self, source: Optional[str], topic: Optional[str]) -> Tuple:
+        """
+        (faiss id selector, chunk count) for a search filter. Ids come from
+        the table's per-source/per-topic rows; selectors are kept until the
+        store changes.
+        """
+        key = (source, topic)
+        if key not in self._selectors:
+            ids = self.table.ids[self.table.rows(source=source, topic=topic)]
+            self._selectors[key] = (faiss.IDSelectorBatch(ids), len(ids))
+        return self._selectors[key]
+
+    def _search_index(self, query_embedding: np.ndarray, k: int, selector=None,
+                      nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """index.search, restricted to the ids of `selector` if given."""
+        if isinstance(self.index, faiss.IndexIVF):
+            if selector is None and nprobe is None:
+                self.index.nprobe = self.nprobe
+                return self.index.search(query_embedding, k)
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe or self.nprobe)
+            return self.index.search(query_embedding, k, params=params)
+        if selector is None:
+            return self.index.search(query_embedding, k)
+        return self.index.search(query_embedding, k, params=faiss.SearchParameters(sel=selector))
+
+    def _load_vector_file(self, path: str):
+        if self.vector_file is not None:
+            self.vector_file.close()
+        self.vector_file = None
+        if os.path.exists(path):
+            self.vector_file = VectorFile(self.dimension, path)
+        elif self.compression:
+            # Saved without a float16 copy: rebuild one from the index
+            ids, vectors = self._stored_vectors()
+            self.vector_file = VectorFile(self.dimension)
+            self.vector_file.write(ids, vectors)
+
+    def _reranks(self) -> bool:
+        compressed = isinstance(self.index, faiss.IndexIVF) and not isinstance(self.index, faiss.IndexIVFFlat)
+        return compressed and self.rerank and self.vector_file is not None
+
+    def _search_reranked(self, query_embedding: np.ndarray, k: int, selector=None,
+                         nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top RERANK_FACTOR x k candidates of the compressed index, re-ranked by exact distance."""
+        _, candidates = self._search_index(query_embedding, k * RERANK_FACTOR, selector, nprobe)
+        candidates = candidates[0][candidates[0] != -1]
+        exact = ((self.vector_file.read(candidates) - query_embedding) ** 2).sum(axis=1)
+        order = np.argsort(exact)[:k]
+        return exact[order][None, :], candidates[order][None, :]
+
     def save(self, directory: str):
         """
         Saves the index and metadata to disk.
         """
         if not os.path.exists(directory):
             os.makedirs(directory)
-            
-        faiss.write_index(self.index, os.path.join(directory, "index.faiss"))
-        with open(os.path.join(directory, "metadata.pkl"), "wb") as f:
-            pickle.dump(self.metadata, f)
 
-    def load(self, directory: str):
+        with self._lock:
+            # Written aside and swapped in: the old file may be mapped by this or another process
+            index_path = os.path.join(directory, "index.faiss")
+            faiss.write_index(self.index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+            self.table.save(directory)
+            # Superseded by the table files; load would otherwise still find it
+            legacy_path = os.path.join(directory, "metadata.pkl")
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            # Documents are rebuilt from the table on load; only hashes are kept
+            with open(os.path.join(directory, "documents.json"), "w") as f:
+                json.dump({source: doc['digest'] for source, doc in self.documents.items()}, f)
+            if self.vector_file is not None:
+                self.vector_file.save_as(os.path.join(directory, VECTOR_FILE), self._next_id)
+
+    def load(self, directory: str, mmap: bool = False):
         """
         Loads the index and metadata from disk.
+        The chunk table is memory-mapped, not read. With `mmap` the index
+        is too, so opening is near-instant, pages are read on demand and
+        processes serving the same store share them in the OS page cache;
+        the index is copied into memory on the first change.
+        Stores saved with pickled metadata are converted; those saved
+        before chunk ids existed (a plain flat index and a metadata list)
+        get row numbers as ids.
+        A compressed index brings back its compression and float16 copy,
+        which is read from `directory`. Nothing there changes until the
+        store is saved again: chunks added meanwhile are kept in memory and
+        in a temporary file, so other processes can share the saved store.
         """
         index_path = os.path.join(directory, "index.faiss")
         metadata_path = os.path.join(directory, "metadata.pkl")
-        
-        if os.path.exists(index_path) and os.path.exists(metadata_path):
-            self.index = faiss.read_index(index_path)
-            with open(metadata_path, "rb") as f:
-                self.metadata = pickle.load(f)
+
+        if os.path.exists(index_path) and (ChunkTable.exists(directory) or os.path.exists(metadata_path)):
+            mapped = mmap and MMAP_FLAG is not None
+            if mmap and not mapped:
+                print("Vector store: this faiss version can't memory-map indexes, reading it instead")
+            index = faiss.read_index(index_path, MMAP_FLAG) if mapped else faiss.read_index(index_path)
+            if ChunkTable.exists(directory):
+                table = ChunkTable.load(directory)
+            else:
+                with open(metadata_path, "rb") as f:
+                    chunks = pickle.load(f)
+                if isinstance(chunks, list):
+                    chunks = dict(enumerate(chunks))
+                table = ChunkTable()
+                table.append(list(chunks), list(chunks.values()))
+            if not isinstance(index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+                vectors = index.reconstruct_n(0, index.ntotal)
+                index = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+                index.add_with_ids(vectors, np.arange(len(vectors), dtype='int64'))
+                mapped = False
+
+            with self._lock:
+                self.index = index
+                self._mapped = mapped
+                self.dimension = index.d
+                self._trained_size = index.ntotal if isinstance(index, faiss.IndexIVF) else 0
+                if isinstance(index, faiss.IndexIVFScalarQuantizer):
+                    self.compression = 'sq8'
+                elif isinstance(index, faiss.IndexIVFPQ):
+                    self.compression = 'pq'
+                self._load_vector_file(os.path.join(directory, VECTOR_FILE))
+                self.table = table
+                self.documents = {source: {'digest': None} for source in table.source_names()}
+                self._next_id = int(table.ids.max()) + 1 if len(table.ids) else 0
+                if self.vector_file is not None:
+                    # Rows of removed chunks past the last id are saved too; don't reuse their ids
+                    self._next_id = max(self._next_id, self.vector_file.base_rows)
+                # Stores saved flat above the threshold move to IVF now
+                self._maybe_rebuild()
+                documents_path = os.path.join(directory, "documents.json")
+                if os.path.exists(documents_path):
+                    with open(documents_path) as f:
+                        for source, digest in json.load(f).items():
+                            if source in self.documents:
+                                self.documents[source]['digest'] = digest
             return True
         return False
@@ -0,0 +1,406 @@
+import hashlib
+import json
+import os
+import numpy as np
+from collections.abc import Sequence
+from typing import List, Dict, Optional, Iterable, Iterator, Union
+from ..ingest.chunk import ChunkFields
+
+# Files of a saved ChunkTable
+NAMES_FILE = "chunk_names.json"
+TEXT_FILE = "chunk_text.bin"
+COLUMN_FILES = {
+    'ids': "chunk_ids.npy",
+    'sources': "chunk_sources.npy",
+    'topics': "chunk_topics.npy",
+    'indices': "chunk_indices.npy",
+    'hashes': "chunk_hashes.npy",
+    'offsets': "chunk_offsets.npy",
+}
+# In-memory text of removed rows that triggers compacting the text tail
+COMPACT_BYTES = 16 * 1024 * 1024
+
+class _Column:
+    """A numpy array that grows by doubling; read-only (memory-mapped) data is copied on first write."""
+    __slots__ = ('data', 'size')
+
+    def __init__(self, dtype, data: np.ndarray = None):
+        self.data = data if data is not None else np.empty(0, dtype)
+        self.size = len(self.data)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.size]
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        end = self.size + len(values)
+        if end > len(self.data) or not self.data.flags.writeable:
+            grown = np.empty(max(end, 2 * len(self.data), 1024), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+class ChunkRecord(ChunkFields):
+    """One row of a ChunkTable; fields are read from the columns on access."""
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table: 'ChunkTable', row: int):
+        self.table = table
+        self.row = row
+
+    @property
+    def chunk_id(self) -> int:
+        return int(self.table.ids[self.row])
+
+    @property
+    def text(self) -> str:
+        return self.table.text(self.row)
+
+    @property
+    def source(self) -> str:
+        return self.table.sources[self.table.source_codes[self.row]]
+
+    @property
+    def topic(self) -> str:
+        return self.table.topics[self.table.topic_codes[self.row]]
+
+    @property
+    def index(self) -> int:
+        return int(self.table.chunk_indices[self.row])
+
+    @property
+    def content_hash(self) -> str:
+        return self.table.hashes[self.row].tobytes().hex()
+
+    def __repr__(self):
+        return f"ChunkRecord(id={self.id!r}, topic={self.topic!r})"
+
+class ChunkView(Sequence):
+    """
+    A selection of ChunkTable rows that reads like a list of chunks:
+    len(), indexing and iteration give ChunkRecords, created on demand.
+    """
+    def __init__(self, table: 'ChunkTable', rows: np.ndarray):
+        self.table = table
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ChunkView(self.table, self.rows[i])
+        return ChunkRecord(self.table, int(self.rows[i]))
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        for row in self.rows:
+            yield ChunkRecord(self.table, int(row))
+
+    def text_lengths(self) -> np.ndarray:
+        """UTF-8 byte length of each chunk's text (no decoding)."""
+        offsets = self.table.offsets
+        return offsets[self.rows + 1] - offsets[self.rows]
+
+    def longer_than(self, min_bytes: int) -> 'ChunkView':
+        return ChunkView(self.table, self.rows[self.text_lengths() > min_bytes])
+
+    def joined_text(self, limit: int, separator: str = " ") -> str:
+        """The chunk texts joined by separator, reading only up to `limit` characters."""
+        parts = []
+        length = 0
+        for row in self.rows:
+            if length >= limit:
+                break
+            text = self.table.text(int(row))
+            parts.append(text)
+            length += len(text) + len(separator)
+        return separator.join(parts)[:limit]
+
+class ChunkTable:
+    """
+    Columnar chunk metadata: the texts in one UTF-8 blob addressed by
+    offsets, and per-row arrays of store id, integer-coded source and
+    topic, chunk index and content hash. A table loaded from disk is
+    memory-mapped; rows added afterwards go to in-memory tails.
+    Removed rows are only masked out, and are dropped on save; their
+    in-memory text is freed once enough of it has piled up.
+    """
+    def __init__(self):
+        self.sources: List[str] = []
+        self.topics: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+        self._topic_codes: Dict[str, int] = {}
+        self._ids = _Column(np.int64)
+        self._sources = _Column(np.int32)
+        self._topics = _Column(np.int32)
+        self._indices = _Column(np.int32)
+        self._hashes = _Column('V16')
+        self._offsets = _Column(np.int64, np.zeros(1, dtype=np.int64))
+        # Memory-mapped text of a loaded table; later texts go to _tail
+        self._blob = None
+        self._blob_size = 0
+        self._tail = bytearray()
+        # Bytes of _tail that belong to removed rows
+        self._dead_tail = 0
+        # None while every row is live (saves a mask for freshly loaded tables)
+        self._live: Optional[_Column] = None
+        self._live_count = 0
+        # Store id -> row (-1 if none), built on first lookup
+        self._row_of_id: Optional[_Column] = None
+        # 'sources'/'topics' -> {code: sorted live rows}, built on first filter
+        self._groups: Dict[str, Dict[int, np.ndarray]] = {}
+
+    # Columns, as read-only views of the current rows
+    ids = property(lambda self: self._ids.values)
+    source_codes = property(lambda self: self._sources.values)
+    topic_codes = property(lambda self: self._topics.values)
+    chunk_indices = property(lambda self: self._indices.values)
+    hashes = property(lambda self: self._hashes.values)
+    offsets = property(lambda self: self._offsets.values)
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def _code(self, names: List[str], codes: Dict[str, int], name: str) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = len(names)
+            names.append(name)
+            codes[name] = code
+        return code
+
+    def append(self, ids: Iterable[int], items: List) -> np.ndarray:
+        """
+        Adds chunks (Chunk records or chunk dicts) under the given store ids.
+        A dict's 'id' is not kept: records rebuild it from source and chunk
+        index, as ingestion names chunks; use chunk_id to tell rows apart.
+        Returns their rows.
+        """
+        ids = np.asarray(list(ids), dtype=np.int64)
+        first = self._ids.size
+        encoded, sources, topics, indices, hashes = [], [], [], [], []
+        for item in items:
+            if isinstance(item, ChunkFields):
+                text, source, topic, index = item.text, item.source, item.topic, item.index
+            else:
+                meta = item['metadata']
+                text, source, topic, index = item['text'], meta.get('source'), meta.get('topic'), meta.get('chunk_index', 0)
+            data = text.encode('utf-8')
+            encoded.append(data)
+            # Same digest as chunk_hash, kept as 16 raw bytes
+            hashes.append(hashlib.blake2b(data, digest_size=16).digest())
+            sources.append(self._code(self.sources, self._source_codes, source))
+            topics.append(self._code(self.topics, self._topic_codes, topic))
+            indices.append(index or 0)
+
+        end = self._blob_size + len(self._tail)
+        self._offsets.append(end + np.cumsum([len(data) for data in encoded], dtype=np.int64))
+        self._tail.extend(b''.join(encoded))
+        self._ids.append(ids)
+        self._sources.append(sources)
+        self._topics.append(topics)
+        self._indices.append(indices)
+        self._hashes.append(hashes)
+
+        rows = np.arange(first, first + len(ids))
+        self._groups = {}
+        if self._live is not None:
+            self._live.append(np.ones(len(ids), dtype=bool))
+        self._live_count += len(ids)
+        if self._row_of_id is not None:
+            self._map_ids(ids, rows)
+        return rows
+
+    def _map_ids(self, ids: np.ndarray, rows: np.ndarray):
+        if not len(ids):
+            return
+        needed = int(ids.max()) + 1
+        if needed > self._row_of_id.size:
+            self._row_of_id.append(np.full(needed - self._row_of_id.size, -1, dtype=np.int64))
+        self._row_of_id.data[ids] = rows
+
+    def rows_of(self, ids: np.ndarray) -> np.ndarray:
+        """Rows of the given store ids (-1 for unknown ones)."""
+        if self._row_of_id is None:
+            self._row_of_id = _Column(np.int64)
+            live = self.live_rows()
+            self._map_ids(self.ids[live], live)
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        known = (ids >= 0) & (ids < self._row_of_id.size)
+        rows[known] = self._row_of_id.data[ids[known]]
+        return rows
+
+    def remove(self, rows: np.ndarray):
+        """Masks out rows; negative rows (unknown ids from rows_of) are ignored."""
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[rows >= 0]
+        if not len(rows):
+            return
+        if self._live is None:
+            self._live = _Column(bool, np.ones(self._ids.size, dtype=bool))
+        rows = rows[self._live.data[rows]]
+        self._live.data[rows] = False
+        self._groups = {}
+        self._live_count -= len(rows)
+        if self._row_of_id is not None:
+            self._row_of_id.data[self.ids[rows]] = -1
+        starts, ends = self.offsets[rows], self.offsets[rows + 1]
+        self._dead_tail += int((ends - starts)[starts >= self._blob_size].sum())
+        if self._dead_tail >= max(COMPACT_BYTES, len(self._tail) // 2):
+            self._compact_tail()
+
+    def _compact_tail(self):
+        """Drops the text of removed rows from _tail; they keep their rows, with empty text."""
+        size = self._ids.size
+        # Rows whose text is in _tail (rows of the loaded blob end at _blob_size)
+        first = int(np.searchsorted(self.offsets[1:], self._blob_size, side='right'))
+        starts = self._offsets.data[first:size] - self._blob_size
+        ends = self._offsets.data[first + 1:size + 1] - self._blob_size
+        live = self._live.data[first:size]
+        tail = memoryview(self._tail)
+        kept = bytearray().join(tail[start:end] for start, end in zip(starts[live].tolist(), ends[live].tolist()))
+        tail.release()
+        lengths = np.where(live, ends - starts, 0)
+        self._offsets.data[first + 1:size + 1] = self._offsets.data[first] + np.cumsum(lengths)
+        self._tail = kept
+        self._dead_tail = 0
+
+    def live_rows(self) -> np.ndarray:
+        if self._live is None:
+            return np.arange(self._ids.size)
+        return np.flatnonzero(self._live.values)
+
+    def _group(self, column: str) -> Dict[int, np.ndarray]:
+        """code -> sorted live rows with that code, for column 'sources' or 'topics'."""
+        groups = self._groups.get(column)
+        if groups is None:
+            live = self.live_rows()
+            codes = (self.source_codes if column == 'sources' else self.topic_codes)[live]
+            order = np.argsort(codes, kind='stable')
+            codes, live = codes[order], live[order]
+            bounds = np.flatnonzero(np.diff(codes)) + 1
+            groups = {}
+            for start, rows in zip(np.concatenate(([0], bounds)).tolist(), np.split(live, bounds)):
+                if len(rows):
+                    rows.setflags(write=False)
+                    groups[int(codes[start])] = rows
+            self._groups[column] = groups
+        return groups
+
+    def rows(self, source: str = None, topic: Union[str, List[str]] = None) -> np.ndarray:
+        """
+        Live rows, optionally only those of a source and/or topic(s).
+        Served from per-source/per-topic row lists, so a filter costs the
+        size of its result, not of the table (after the first one).
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if source is None and topic is None:
+            return self.live_rows()
+        selected = None
+        if source is not None:
+            selected = self._group('sources').get(self._source_codes.get(source), empty)
+        if topic is not None:
+            names = [topic] if isinstance(topic, str) else topic
+            groups = self._group('topics')
+            parts = [groups.get(self._topic_codes.get(name), empty) for name in names]
+            rows = parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts or [empty]))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return selected
+
+    def view(self, rows: np.ndarray = None) -> ChunkView:
+        return ChunkView(self, self.live_rows() if rows is None else rows)
+
+    def record(self, row: int) -> ChunkRecord:
+        return ChunkRecord(self, row)
+
+    def text(self, row: int) -> str:
+        start, end = int(self._offsets.data[row]), int(self._offsets.data[row + 1])
+        if end <= self._blob_size:
+            return bytes(self._blob[start:end]).decode('utf-8')
+        if start >= self._blob_size:
+            return self._tail[start - self._blob_size:end - self._blob_size].decode('utf-8')
+        return (bytes(self._blob[start:]) + self._tail[:end - self._blob_size]).decode('utf-8')
+
+    def topic_names(self) -> List[str]:
+        """Sorted topics of the live rows."""
+        codes = np.unique(self.topic_codes[self.live_rows()])
+        return sorted(self.topics[code] for code in codes if self.topics[code] is not None)
+
+    def source_names(self) -> List[str]:
+        codes = np.unique(self.source_codes[self.live_rows()])
+        return [self.sources[code] for code in codes]
+
+    def save(self, directory: str):
+        """Writes the live rows; text of removed rows is dropped here."""
+        live = self.live_rows()
+        starts = self.offsets[live]
+        ends = self.offsets[live + 1]
+        lengths = ends - starts
+        tmp_text = os.path.join(directory, TEXT_FILE + ".tmp")
+        with open(tmp_text, 'wb') as f:
+            if self._live is None and not self._tail:
+                f.write(memoryview(self._blob) if self._blob is not None else b'')
+            else:
+                for start, end in zip(starts.tolist(), ends.tolist()):
+                    f.write(self._slice(start, end))
+        offsets = np.zeros(len(live) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        columns = {
+            'ids': self.ids[live],
+            'sources': self.source_codes[live],
+            'topics': self.topic_codes[live],
+            'indices': self.chunk_indices[live],
+            'hashes': self.hashes[live],
+            'offsets': offsets,
+        }
+        # Written aside and swapped in, so a table mapped from these files stays valid
+        for name, values in columns.items():
+            path = os.path.join(directory, COLUMN_FILES[name])
+            with open(path + ".tmp", 'wb') as f:
+                np.save(f, values)
+            os.replace(path + ".tmp", path)
+        os.replace(tmp_text, os.path.join(directory, TEXT_FILE))
+        with open(os.path.join(directory, NAMES_FILE), 'w') as f:
+            json.dump({'sources': self.sources, 'topics': self.topics}, f)
+
+    def _slice(self, start: int, end: int) -> bytes:
+        if end <= self._blob_size:
+            return bytes(self._blob[start:end])
+        if start >= self._blob_size:
+            return bytes(self._tail[start - self._blob_size:end - self._blob_size])
+        return bytes(self._blob[start:]) + bytes(self._tail[:end - self._blob_size])
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, NAMES_FILE))
+
+    @classmethod
+    def load(cls, directory: str) -> 'ChunkTable':
+        """Opens a saved table; columns and text are memory-mapped, not read."""
+        table = cls()
+        with open(os.path.join(directory, NAMES_FILE)) as f:
+            names = json.load(f)
+        table.sources = names['sources']
+        table.topics = names['topics']
+        table._source_codes = {name: code for code, name in enumerate(table.sources)}
+        table._topic_codes = {name: code for code, name in enumerate(table.topics)}
+
+        def column(name, dtype):
+            return _Column(dtype, np.load(os.path.join(directory, COLUMN_FILES[name]), mmap_mode='r'))
+
+        table._ids = column('ids', np.int64)
+        table._sources = column('sources', np.int32)
+        table._topics = column('topics', np.int32)
+        table._indices = column('indices', np.int32)
+        table._hashes = column('hashes', 'V16')
+        table._offsets = column('offsets', np.int64)
+        text_path = os.path.join(directory, TEXT_FILE)
+        table._blob_size = os.path.getsize(text_path)
+        if table._blob_size:
+            table._blob = np.memmap(text_path, dtype=np.uint8, mode='r')
+        table._live_count = table._ids.size
+        return table
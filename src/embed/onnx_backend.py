@@ -0,0 +1,93 @@
+import json
+import os
+import numpy as np
+from typing import List
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+# Files written by scripts/export_onnx_embedder.py
+ONNX_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# Tokens read per text, as the sentence-transformers model does
+MAX_SEQ_LENGTH = 256
+# Lowest cosine similarity to the torch embeddings accepted for the int8 model,
+# so its vectors can be searched against indexes built with torch
+COSINE_TOLERANCE = 0.98
+
+def default_model_dir(model_name: str) -> str:
+    return os.path.join("edubuddy_models", model_name.replace('/', '_') + "-onnx-int8")
+
+def normalizer_lowercases(normalizer) -> bool:
+    """True if a tokenizer.json normalizer (or one in a Sequence) lowercases."""
+    if not normalizer:
+        return False
+    if normalizer.get('type') == 'Sequence':
+        return any(normalizer_lowercases(n) for n in normalizer.get('normalizers', []))
+    return normalizer.get('type') == 'Lowercase' or bool(normalizer.get('type') == 'BertNormalizer' and normalizer.get('lowercase'))
+
+class OnnxEncoder:
+    """
+    Runs an exported, int8-quantized sentence-transformer through ONNX Runtime.
+    Mirrors the part of SentenceTransformer.encode that Embedder uses: mean
+    pooling over the attention mask followed by L2 normalization.
+    """
+    def __init__(self, model_dir: str, threads: int = None):
+        if ort is None or Tokenizer is None:
+            raise ImportError("The ONNX backend needs onnxruntime and tokenizers (pip install onnxruntime tokenizers).")
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run scripts/export_onnx_embedder.py first.")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.max_seq_length = MAX_SEQ_LENGTH
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+        self.lowercases_input = normalizer_lowercases(json.loads(self.tokenizer.to_str()).get('normalizer'))
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Embeds texts `batch_size` at a time; other encode() options are ignored."""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batches.append(self._encode_batch(texts[start:start + batch_size]))
+        if not batches:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.concatenate(batches)
+
+    @property
+    def dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feed['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, {k: v for k, v in feed.items() if k in self.input_names})[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Lowest row-wise cosine similarity between two embedding matrices."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return float((reference * candidate).sum(axis=1).min())
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Optional
+
+# Rows added whenever the file has to grow
+GROW_ROWS = 65536
+
+class VectorFile:
+    """
+    On-disk float16 copy of a store's vectors, with the chunk id as row
+    number. Rows of removed chunks are simply left behind. Used to re-rank
+    candidates from a compressed index exactly and to retrain it.
+    A saved file (`path`) is mapped read-only and never changed: rows added
+    later go to a private temporary file, and only save_as writes a new
+    file, so other processes can keep mapping the saved store.
+    """
+    def __init__(self, dimension: int, path: Optional[str] = None):
+        self.dimension = dimension
+        # Saved rows, read-only; ids below base_rows are read from here
+        self.base_path = None
+        self.base_rows = 0
+        self._base = None
+        if path is not None:
+            self._open_base(path)
+        fd, self.path = tempfile.mkstemp(prefix="edubuddy_vectors_", suffix=".f16")
+        os.close(fd)
+        # Rows added since, by id - base_rows
+        self._rows = 0
+        self._data = None
+
+    def _row_bytes(self) -> int:
+        return self.dimension * 2
+
+    def _open_base(self, path: str):
+        self.base_path = path
+        self.base_rows = os.path.getsize(path) // self._row_bytes()
+        self._base = None
+        if self.base_rows:
+            self._base = np.memmap(path, dtype=np.float16, mode='r', shape=(self.base_rows, self.dimension))
+
+    def _open(self, rows: int):
+        self.flush()
+        self._data = None
+        with open(self.path, 'ab') as f:
+            f.truncate(rows * self._row_bytes())
+        self._rows = rows
+        if rows:
+            self._data = np.memmap(self.path, dtype=np.float16, mode='r+', shape=(rows, self.dimension))
+
+    def write(self, ids: np.ndarray, vectors: np.ndarray):
+        """Writes the vectors of new chunk ids; ids of saved rows can't be rewritten."""
+        ids = np.asarray(ids, dtype='int64')
+        if not len(ids):
+            return
+        if int(ids.min()) < self.base_rows:
+            raise ValueError("VectorFile rows that were saved are read-only")
+        rows = ids - self.base_rows
+        needed = int(rows.max()) + 1
+        if needed > self._rows:
+            self._open(max(needed, self._rows + GROW_ROWS))
+        self._data[rows] = vectors
+
+    def read(self, ids: np.ndarray) -> np.ndarray:
+        """float32 vectors of the given chunk ids."""
+        ids = np.asarray(ids, dtype='int64')
+        if self._data is None:
+            return np.asarray(self._base[ids], dtype=np.float32)
+        if self._base is None:
+            return np.asarray(self._data[ids - self.base_rows], dtype=np.float32)
+        vectors = np.empty((len(ids), self.dimension), dtype=np.float32)
+        saved = ids < self.base_rows
+        vectors[saved] = self._base[ids[saved]]
+        vectors[~saved] = self._data[ids[~saved] - self.base_rows]
+        return vectors
+
+    def flush(self):
+        if self._data is not None:
+            self._data.flush()
+
+    def save_as(self, path: str, rows: int):
+        """
+        Writes the first `rows` rows to `path`, aside and then swapped in:
+        the old file may be mapped by this or another process. The file
+        then becomes the saved rows this one reads from.
+        """
+        self.flush()
+        with open(path + ".tmp", 'wb') as dst:
+            # From the mapping: another process may have replaced base_path since
+            for start in range(0, self.base_rows, GROW_ROWS):
+                dst.write(self._base[start:start + GROW_ROWS].tobytes())
+            with open(self.path, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            dst.truncate(rows * self._row_bytes())
+        os.replace(path + ".tmp", path)
+        self._open_base(path)
+        self._open(0)
+
+    def close(self):
+        self._data = None
+        self._base = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,178 @@
+import hashlib
+from bisect import bisect_right
+from typing import List, Dict, Any
+
+# Pending appends are joined into one string once they reach this many chars
+COMPACT_CHARS = 64 * 1024
+
+def chunk_hash(text: str) -> str:
+    """Content hash of a chunk's text; equal hashes mean the embedding can be reused."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class DocumentBuffer:
+    """
+    Append-only text of one document. Chunks refer to it by offsets, so
+    overlapping chunks share characters instead of each holding a copy.
+    """
+    __slots__ = ('_parts', '_starts', '_tail', '_tail_len', 'length')
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._starts: List[int] = []
+        self._tail: List[str] = []
+        self._tail_len = 0
+        self.length = 0
+
+    def append(self, text: str) -> int:
+        """Appends text and returns the offset it starts at."""
+        start = self.length
+        self._tail.append(text)
+        self._tail_len += len(text)
+        self.length += len(text)
+        if self._tail_len >= COMPACT_CHARS:
+            self._compact()
+        return start
+
+    def _compact(self):
+        if self._tail:
+            self._starts.append(self.length - self._tail_len)
+            self._parts.append(''.join(self._tail))
+            self._tail = []
+            self._tail_len = 0
+
+    def slice(self, start: int, end: int) -> str:
+        self._compact()
+        i = bisect_right(self._starts, start) - 1
+        pieces = []
+        while i < len(self._parts) and self._starts[i] < end:
+            part_start = self._starts[i]
+            pieces.append(self._parts[i][max(0, start - part_start):end - part_start])
+            i += 1
+        return ''.join(pieces)
+
+    def __getstate__(self):
+        self._compact()
+        return (self._parts, self._starts, self.length)
+
+    def __setstate__(self, state):
+        self._parts, self._starts, self.length = state
+        self._tail = []
+        self._tail_len = 0
+
+class DocumentStore:
+    """
+    Interned sources, topic names and document buffers shared by Chunk records.
+    """
+    def __init__(self):
+        self.sources: List[str] = []
+        self.buffers: List[DocumentBuffer] = []
+        self.topics: List[str] = []
+        self._topic_ids: Dict[str, int] = {}
+
+    def add_document(self, source: str) -> int:
+        """Starts a new, empty document buffer and returns its id."""
+        self.sources.append(source)
+        self.buffers.append(DocumentBuffer())
+        return len(self.buffers) - 1
+
+    def topic_id(self, topic: str) -> int:
+        topic_id = self._topic_ids.get(topic)
+        if topic_id is None:
+            topic_id = len(self.topics)
+            self.topics.append(topic)
+            self._topic_ids[topic] = topic_id
+        return topic_id
+
+    def release(self, doc_id: int):
+        """Frees a document's text once no Chunk refers to it anymore."""
+        self.buffers[doc_id] = DocumentBuffer()
+
+    def append(self, doc_id: int, text: str) -> int:
+        return self.buffers[doc_id].append(text)
+
+    def text(self, doc_id: int, start: int, end: int) -> str:
+        return self.buffers[doc_id].slice(start, end)
+
+class ChunkFields:
+    """
+    Dict-style access shared by chunk records: subclasses provide text,
+    source, topic and index, and get the fields of the old chunk dicts
+    (chunk['text'], chunk['metadata']['topic'], chunk.get('source')).
+    """
+    __slots__ = ()
+
+    @property
+    def id(self) -> str:
+        return f"{self.source}_{self.index}"
+
+    @property
+    def content_hash(self) -> str:
+        return chunk_hash(self.text)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "chunk_index": self.index,
+            "topic": self.topic
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The equivalent chunk dict, as produced by process_file_content."""
+        return {
+            "id": self.id,
+            "text": self.text,
+            "metadata": self.metadata
+        }
+
+    _FIELDS = {
+        'id': lambda c: c.id,
+        'text': lambda c: c.text,
+        'metadata': lambda c: c.metadata,
+        'source': lambda c: c.source,
+        'topic': lambda c: c.topic,
+        'chunk_index': lambda c: c.index,
+    }
+
+    def __getitem__(self, key: str):
+        try:
+            return ChunkFields._FIELDS[key](self)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        getter = ChunkFields._FIELDS.get(key)
+        return getter(self) if getter else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in ChunkFields._FIELDS
+
+class Chunk(ChunkFields):
+    """
+    A chunk of a document stored as (doc_id, start, end, topic_id) against a
+    DocumentStore; the text is materialized on access.
+    """
+    __slots__ = ('store', 'doc_id', 'start', 'end', 'topic_id', 'index')
+
+    def __init__(self, store: DocumentStore, doc_id: int, start: int, end: int, topic_id: int, index: int):
+        self.store = store
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+        self.topic_id = topic_id
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.store.text(self.doc_id, self.start, self.end)
+
+    @property
+    def source(self) -> str:
+        return self.store.sources[self.doc_id]
+
+    @property
+    def topic(self) -> str:
+        return self.store.topics[self.topic_id]
+
+    def __repr__(self):
+        return f"Chunk(id={self.id!r}, topic={self.topic!r}, span=({self.start}, {self.end}))"
@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+from .chunk import Chunk, DocumentStore
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
     """
@@ -43,3 +44,73 @@ def process_file_content(file_name: str, text: str, chunk_size: int = 1000, over
         })
         
     return chunks_with_metadata
+
+def chunk_spans(text_len: int, chunk_size: int = 1000, overlap: int = 200) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of the chunks chunk_text would cut from a text of
+    length `text_len`.
+    """
+    spans = []
+    start = 0
+    while start < text_len:
+        end = start + chunk_size
+        spans.append((start, min(end, text_len)))
+        if end >= text_len:
+            break
+        start += (chunk_size - overlap)
+    return spans
+
+def make_chunks(store: DocumentStore, file_name: str, segments: List[Dict[str, str]],
+                chunk_size: int = 1000, overlap: int = 200) -> List[Chunk]:
+    """
+    Chunks each topic segment like process_file_content, but returns compact
+    Chunk records: the segment text is stored once in the file's document
+    buffer and chunks keep offsets into it.
+    """
+    doc_id = store.add_document(file_name)
+    chunks = []
+    for segment in segments:
+        content = segment['content']
+        topic_id = store.topic_id(segment['topic'])
+        base = store.append(doc_id, content)
+        for i, (start, end) in enumerate(chunk_spans(len(content), chunk_size, overlap)):
+            chunks.append(Chunk(store, doc_id, base + start, base + end, topic_id, i))
+    return chunks
+
+def iter_chunks(store: DocumentStore, file_name: str, segments: Iterable[Tuple[int, str, str]],
+                chunk_size: int = 1000, overlap: int = 200) -> Iterator[Chunk]:
+    """
+    Streaming counterpart of make_chunks.
+    Consumes (segment_index, topic, piece) tuples from TopicExtractor.iter_segments
+    and yields the chunks make_chunks would produce for each segment.
+    Pieces go straight into the document buffer; no chunk text is copied.
+    """
+    step = chunk_size - overlap
+    doc_id = store.add_document(file_name)
+    current_segment = None
+    topic_id = None
+    pos = 0 # buffer offset where the next chunk starts
+    length = 0 # buffer length so far
+    i = 0
+
+    for segment_index, segment_topic, piece in segments:
+        if segment_index != current_segment:
+            # Flush the tail of the previous segment
+            if length > pos:
+                yield Chunk(store, doc_id, pos, length, topic_id, i)
+            current_segment = segment_index
+            topic_id = store.topic_id(segment_topic)
+            pos = length
+            i = 0
+
+        store.append(doc_id, piece)
+        length += len(piece)
+        # Emit a chunk only once text exists beyond its end; the last chunk
+        # of a segment is emitted on flush, exactly like chunk_text
+        while length - pos > chunk_size:
+            yield Chunk(store, doc_id, pos, pos + chunk_size, topic_id, i)
+            i += 1
+            pos += step
+
+    if length > pos:
+        yield Chunk(store, doc_id, pos, length, topic_id, i)
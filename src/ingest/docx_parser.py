@@ -0,0 +1,180 @@
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_BODY = W + 'body'
+_P = W + 'p'
+_TBL = W + 'tbl'
+_TR = W + 'tr'
+_TC = W + 'tc'
+_T = W + 't'
+_TAB = W + 'tab'
+_PTAB = W + 'ptab'
+_BR = W + 'br'
+_CR = W + 'cr'
+_NO_BREAK_HYPHEN = W + 'noBreakHyphen'
+_PPR = W + 'pPr'
+_PSTYLE = W + 'pStyle'
+_TXBX = W + 'txbxContent'
+_VAL = W + 'val'
+
+# Built-in style names are stored in English whatever the Word UI language
+HEADING_STYLES = {'heading 1': 1, 'heading 2': 2}
+TABLE_CELL_SEPARATOR = " | "
+
+class DocxBlock(NamedTuple):
+    """
+    A top-level paragraph or table of a DOCX body.
+    heading is 1 or 2 for "Heading 1"/"Heading 2" paragraphs, 0 otherwise.
+    Tables are one block with a line per row.
+    """
+    text: str
+    heading: int
+
+def _style_headings(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Maps style ids to heading levels, from word/styles.xml."""
+    try:
+        root = ET.fromstring(archive.read('word/styles.xml'))
+    except KeyError:
+        # No style definitions: fall back to Word's default style ids
+        return {'Heading1': 1, 'Heading2': 2}
+    headings = {}
+    for style in root.iter(W + 'style'):
+        name = style.find(W + 'name')
+        level = HEADING_STYLES.get((name.get(_VAL) or '').lower()) if name is not None else None
+        if level:
+            headings[style.get(W + 'styleId')] = level
+    return headings
+
+def _append_text(elem, parts: List[str]):
+    """Collects run text like python-docx's Paragraph.text (text boxes excluded)."""
+    for child in elem:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or '')
+        elif tag == _TAB or tag == _PTAB:
+            parts.append('\t')
+        elif tag == _BR or tag == _CR:
+            parts.append('\n')
+        elif tag == _NO_BREAK_HYPHEN:
+            parts.append('-')
+        elif tag != _PPR and tag != _TXBX and len(child):
+            _append_text(child, parts)
+
+def _paragraph_text(p) -> str:
+    parts = []
+    _append_text(p, parts)
+    return ''.join(parts)
+
+def _paragraph_heading(p, headings: Dict[str, int]) -> int:
+    ppr = p.find(_PPR)
+    style = ppr.find(_PSTYLE) if ppr is not None else None
+    if style is None:
+        return 0
+    return headings.get(style.get(_VAL), 0)
+
+def _table_text(tbl) -> str:
+    """One line per row, cells separated by TABLE_CELL_SEPARATOR. Nested tables are flattened into their cell."""
+    rows = []
+    for tr in tbl.iter(_TR):
+        cells = []
+        for tc in tr.findall(_TC):
+            cells.append(' '.join(text for text in (_paragraph_text(p) for p in tc.iter(_P)) if text))
+        if any(cells):
+            rows.append(TABLE_CELL_SEPARATOR.join(cells))
+    return '\n'.join(rows)
+
+def iter_docx_blocks(file_path: str) -> Iterator[DocxBlock]:
+    """
+    Streams the paragraphs and tables of a DOCX body in document order.
+    word/document.xml is read incrementally with iterparse and each block
+    is dropped from the tree once yielded, so memory stays flat however
+    long the document is.
+    Raises zipfile.BadZipFile / KeyError / ET.ParseError on unreadable files.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        headings = _style_headings(archive)
+        with archive.open('word/document.xml') as xml:
+            body = None
+            # Depth of open paragraph/table elements; only outermost ones become blocks
+            open_blocks = 0
+            for event, elem in ET.iterparse(xml, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == _BODY:
+                        body = elem
+                    elif tag == _P or tag == _TBL:
+                        open_blocks += 1
+                    continue
+
+                if tag != _P and tag != _TBL:
+                    continue
+                open_blocks -= 1
+                if open_blocks:
+                    # Paragraph inside a table cell or text box; handled with its parent
+                    continue
+                if tag == _P:
+                    yield DocxBlock(_paragraph_text(elem), _paragraph_heading(elem, headings))
+                else:
+                    yield DocxBlock(_table_text(elem), 0)
+                if body is not None:
+                    # Drop everything parsed so far
+                    body.clear()
+                else:
+                    elem.clear()
+
+def iter_heading_segments(blocks: Iterable[DocxBlock]) -> Iterator[Tuple[int, str, str]]:
+    """
+    Splits blocks into topic segments at Heading 1/2 paragraphs and yields
+    (segment_index, topic, piece) tuples, like TopicExtractor.iter_segments.
+    Text before the first heading is filed under "Introduction"; headings
+    with no text are kept as body text.
+    """
+    index = -1
+    topic = "Introduction"
+    started = False  # whether the current segment has yielded a piece yet
+    for block in blocks:
+        heading = block.text.strip() if block.heading else ''
+        if heading:
+            topic = heading
+            started = False
+            continue
+        if not block.text.strip() and not started:
+            continue
+        if not started:
+            index += 1
+            started = True
+            yield index, topic, block.text
+        else:
+            yield index, topic, '\n' + block.text
+
+def docx_text(blocks: Iterable[DocxBlock]) -> str:
+    """The document as plain text, one block per line."""
+    return "".join(block.text + "\n" for block in blocks)
+
+def iter_docx_units(blocks: Iterable[DocxBlock]) -> Iterator[str]:
+    """Streaming docx_text: the block texts, then '' for the final newline."""
+    seen = False
+    for block in blocks:
+        seen = True
+        yield block.text
+    if seen:
+        yield ''
+
+def heading_segments(blocks: List[DocxBlock]) -> List[Dict[str, str]]:
+    """
+    Topic segments from Heading 1/2 styles, or [] if the document has no
+    such headings and needs text-based segmentation.
+    """
+    if not any(block.heading and block.text.strip() for block in blocks):
+        return []
+    segments = []
+    for index, topic, piece in iter_heading_segments(blocks):
+        if index == len(segments):
+            segments.append({'topic': topic, 'content': [piece]})
+        else:
+            segments[index]['content'].append(piece)
+    for segment in segments:
+        segment['content'] = ''.join(segment['content'])
+    return segments
@@ -1,67 +1,505 @@
-from src.ingest.text_parser import parse_file
-from src.ingest.chunker import process_file_content
+from src.ingest.text_parser import parse_file, iter_file, parse_images, parse_docx_blocks, IMAGE_EXTENSIONS
+from src.ingest.docx_parser import iter_docx_blocks, iter_docx_units, iter_heading_segments, heading_segments, docx_text
+from src.ingest.chunker import make_chunks, iter_chunks
+from src.ingest.chunk import Chunk, DocumentStore
 from src.ingest.topic_extractor import TopicExtractor
+from src.ingest.parse_cache import ParseCache, file_digest
+from src.ingest.ocr_engine import OCR_MAX_CONCURRENT
 from src.utils.analytics_logger import AnalyticsLogger
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Iterator, Callable, Optional, Tuple
+from itertools import chain
+import multiprocessing
 import os
 
+MEDIA_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.mp4', '.avi']
+GENERIC_MEDIA_NAMES = ['screenshot', 'whatsapp', 'untitled', 'image', 'video', 'capture']
+# A streamed document is cached only if it fits in 1/CACHE_MAX_FILE_SHARE of the parse cache
+CACHE_MAX_FILE_SHARE = 8
+
+def parse_and_segment(file_path: str, topic_extractor: TopicExtractor = None, text: str = None) -> List[Dict[str, str]]:
+    """
+    Parses a single file and splits it into topic segments.
+    Module-level so it can run inside worker processes.
+    Segments that should be named after the file get topic None (see
+    resolve_topics), which keeps the result cacheable by file content.
+    `text` skips parsing when the file was already parsed (e.g. batch OCR).
+    DOCX files with Heading 1/2 styles are segmented by those headings
+    instead of the TopicExtractor regexes.
+    Returns an empty list if the file yielded no text.
+    """
+    if topic_extractor is None:
+        topic_extractor = TopicExtractor()
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if text is None and ext == '.docx':
+        blocks = parse_docx_blocks(file_path)
+        segments = heading_segments(blocks)
+        if segments:
+            return segments
+        text = docx_text(blocks)
+
+    # 1. Parse Text
+    if text is None:
+        text = parse_file(file_path)
+    if not text:
+        return []
+
+    # 2. Extract Topics
+    segments = topic_extractor.extract_segments(text)
+
+    # Check file type for media
+    if ext in MEDIA_EXTENSIONS and len(segments) == 1 and segments[0]['topic'] == 'General':
+        # OCR text only produced a generic topic, use the filename logic instead
+        segments = []
+
+    if not segments:
+        # Fallback to filename if no segments found
+        segments = [{'topic': None, 'content': text}]
+
+    return segments
+
+def parse_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for parse_and_segment. Uses spawn: forking the app process,
+    which already runs torch/OCR threads, can deadlock the children.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+def document_name(file_path: str, root: str = None) -> str:
+    """
+    Name a file's chunks are indexed under (their source): the path
+    relative to `root` (with '/' separators), so files of the same name in
+    different folders of a library stay apart. Without a root it is the
+    base name: uploads land in fresh temporary directories, so the path
+    itself is not stable.
+    """
+    if root is None:
+        return os.path.basename(file_path)
+    return os.path.relpath(file_path, root).replace(os.sep, '/')
+
+def fallback_topic(file_path: str) -> str:
+    """Topic used for files with no detectable headers."""
+    topic_name = os.path.basename(file_path)
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in MEDIA_EXTENSIONS:
+        # Check for generic filenames
+        lower_name = topic_name.lower()
+        if any(x in lower_name for x in GENERIC_MEDIA_NAMES):
+            topic_name = "Uncategorized Media"
+    return topic_name
+
+def resolve_topics(file_path: str, segments: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Fills in the filename-based topic for segments left unnamed by parse_and_segment."""
+    if all(segment['topic'] is not None for segment in segments):
+        return segments
+    topic_name = fallback_topic(file_path)
+    return [
+        segment if segment['topic'] is not None else {'topic': topic_name, 'content': segment['content']}
+        for segment in segments
+    ]
+
 class Ingestor:
-    def __init__(self):
+    def __init__(self, workers: int = 1, cache: ParseCache = None, store: DocumentStore = None,
+                 root: str = None):
+        """
+        workers: number of processes used to parse and segment files.
+        1 keeps everything in the current process.
+        cache: optional ParseCache; files already parsed skip parsing and OCR.
+        store: DocumentStore holding the text the produced Chunks point into.
+        root: directory documents are named relative to (see document_name);
+        None names them by file name.
+        """
         self.topic_extractor = TopicExtractor()
         self.logger = AnalyticsLogger()
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.store = store if store is not None else DocumentStore()
+        self.root = root
+        self._digests: Dict[str, str] = {}
+        # Chunks of the last ingest_into that kept their embedding / were embedded
+        self.reused = 0
+        self.recomputed = 0
 
-    def ingest(self, file_paths: list) -> list:
+    def ingest(self, file_paths: list, workers: int = None) -> List[Chunk]:
+        workers = self.workers if workers is None else max(1, workers)
+        segments_per_file = self._segment_files(file_paths, workers)
+
+        # Chunking runs in input order so chunk order and ids stay deterministic
         all_chunks = []
+        for file_path, segments in zip(file_paths, segments_per_file):
+            if segments is None:
+                self._log(file_path, "failed")
+                continue
+            if not segments:
+                continue
+
+            all_chunks.extend(self._chunk_segments(file_path, segments))
+
+            # Log success
+            self._log(file_path, "success")
+
+        return all_chunks
+
+    def iter_ingest(self, file_paths: list) -> Iterator[Chunk]:
+        """
+        Streaming counterpart of ingest: yields chunks as they are produced.
+        Documents stream page by page (or paragraph/line) through the segmenter
+        and chunker, so only a small window of text is held per file.
+        Media files are OCR'd whole. Images are OCR'd here in one batch
+        through the shared OCR engine. With workers > 1 and at least two
+        videos, the videos run ahead in a process pool so they don't hold up
+        the documents behind them. Each worker loads its own OCR model, so
+        that pool has at most OCR_MAX_CONCURRENT workers, the limit a single
+        engine applies.
+        """
+        keys = [self._cache_key(p) for p in file_paths]
+        cached = [self.cache.get(key) if key else None for key in keys]
+
+        media = [i for i, p in enumerate(file_paths)
+                 if cached[i] is None and os.path.splitext(p)[1].lower() in MEDIA_EXTENSIONS]
+        videos = [i for i in media if not self._is_image(file_paths[i])]
+        pool = None
+        futures = {}
+        if self.workers > 1 and len(videos) >= 2:
+            try:
+                pool = parse_pool(min(self.workers, len(videos), OCR_MAX_CONCURRENT))
+                futures = {i: pool.submit(parse_and_segment, file_paths[i]) for i in videos}
+            except Exception as e:
+                print(f"Warning: Parallel ingestion unavailable, running serially: {e}")
+                pool = None
+                futures = {}
+
+        ocr_texts = None
+        try:
+            for i, file_path in enumerate(file_paths):
+                if ocr_texts is None and i in media and self._is_image(file_path):
+                    # First image to OCR: batch it with all the images still ahead
+                    ocr_texts = self._batch_ocr([file_paths[j] for j in media if j >= i])
+                num_chunks = 0
+                try:
+                    text = ocr_texts.get(file_path) if ocr_texts else None
+                    for chunk in self._iter_file_chunks(file_path, keys[i], cached[i], futures.get(i), text):
+                        num_chunks += 1
+                        yield chunk
+                except Exception as e:
+                    print(f"Error ingesting {file_path}: {e}")
+                    self._log(file_path, "failed")
+                    continue
+                if num_chunks:
+                    self._log(file_path, "success")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def ingest_into(self, file_paths: list, embedder, vector_store, batch_size: int = 64,
+                    on_batch: Callable[[int], None] = None) -> int:
+        """
+        Streams chunks from file_paths into vector_store in batches of
+        `batch_size`, so early chunks are searchable while later files are
+        still being parsed. The store grows in place: files it already holds
+        with the same content are skipped (see pending_files).
+        A new version of an indexed file is diffed chunk by chunk: chunks
+        whose text is unchanged keep their stored embedding, only changed
+        ones are embedded, and chunks that vanished are removed. The counts
+        end up in self.reused / self.recomputed.
+        A document's text is released from self.store once its chunks are
+        in vector_store, so the store only holds the documents in flight.
+        Returns the number of chunks indexed (reused or embedded).
+        on_batch is called with the running total after each batch.
+        """
+        file_paths = self.pending_files(file_paths, vector_store)
+        # source -> {chunk_hash: ids} of the indexed version, for files being revised
+        revisions = {}
         for file_path in file_paths:
-            # 1. Parse Text
-            text = parse_file(file_path)
-            if not text:
+            name = document_name(file_path, self.root)
+            if vector_store.has_document(name):
+                revisions[name] = vector_store.document_hashes(name)
+        reused = {}  # source -> {old chunk id: new chunk}
+        seen = set()  # sources that produced chunks
+        self.reused = 0
+        self.recomputed = 0
+
+        total = 0
+        batch = []
+        doc_id = None  # document being streamed
+        finished = []  # earlier documents, released once the batch is indexed
+        revised = []  # released after revise_document has copied their reused chunks
+
+        def finish(done_id):
+            (revised if self.store.sources[done_id] in revisions else finished).append(done_id)
+
+        for chunk in self.iter_ingest(file_paths):
+            if chunk.doc_id != doc_id:
+                if doc_id is not None:
+                    finish(doc_id)
+                doc_id = chunk.doc_id
+            seen.add(chunk.source)
+            old_ids = revisions.get(chunk.source, {}).get(chunk.content_hash)
+            if old_ids:
+                reused.setdefault(chunk.source, {})[old_ids.pop(0)] = chunk
+                self.reused += 1
+                total += 1
                 continue
-                
-            # 2. Extract Topics
-            # Check file type for media
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext in ['.png', '.jpg', '.jpeg', '.mp4', '.avi']:
-                # Try to extract topic from OCR text first
-                segments = self.topic_extractor.extract_segments(text)
-                
-                # If no segments found (or just General), fallback to filename logic
-                if not segments or (len(segments) == 1 and segments[0]['topic'] == 'General'):
-                    topic_name = os.path.basename(file_path)
-                    
-                    # Check for generic filenames
-                    lower_name = topic_name.lower()
-                    if any(x in lower_name for x in ['screenshot', 'whatsapp', 'untitled', 'image', 'video', 'capture']):
-                        topic_name = "Uncategorized Media"
-                        
-                    segments = [{'topic': topic_name, 'content': text}]
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                total += self._index_batch(batch, embedder, vector_store)
+                batch = []
+                self._release(finished)
+                if on_batch:
+                    on_batch(total)
+        if doc_id is not None:
+            finish(doc_id)
+        if batch:
+            total += self._index_batch(batch, embedder, vector_store)
+        self._release(finished)
+        if on_batch:
+            on_batch(total)
+
+        for name, old in revisions.items():
+            # A revision that failed to parse leaves the indexed version alone
+            if name in seen:
+                vanished = [chunk_id for ids in old.values() for chunk_id in ids]
+                vector_store.revise_document(name, reused.get(name, {}), vanished)
+        self._release(revised)
+        if revisions:
+            print(f"Re-indexed {len(revisions)} revised file(s): {self.reused} chunks reused, "
+                  f"{self.recomputed} embedded")
+
+        # Files that produced chunks are now known by content, for the skip check
+        for file_path in file_paths:
+            name = document_name(file_path, self.root)
+            if name in seen:
+                vector_store.register_document(name, self._digest(file_path))
+        return total
+
+    def pending_files(self, file_paths: list, vector_store) -> list:
+        """
+        Returns the file_paths vector_store does not hold yet: a file is
+        skipped if a document of the same name and content is indexed.
+        """
+        pending = []
+        for file_path in file_paths:
+            try:
+                digest = self._digest(file_path)
+            except OSError:
+                pending.append(file_path)
+                continue
+            if vector_store.has_document(document_name(file_path, self.root), digest):
+                print(f"Skipping {file_path}: already indexed")
             else:
-                segments = self.topic_extractor.extract_segments(text)
-                if not segments:
-                    # Fallback to filename if no segments found
-                    topic_name = os.path.basename(file_path)
-                    segments = [{'topic': topic_name, 'content': text}]
-            
-            # 3. Chunk per Topic
-            for segment in segments:
-                topic = segment['topic']
-                content = segment['content']
-                
-                # Chunk the segment content
-                chunks = process_file_content(file_path, content)
-                
-                # Add topic to metadata
-                for chunk in chunks:
-                    if 'metadata' not in chunk:
-                        chunk['metadata'] = {}
-                    chunk['metadata']['topic'] = topic
-                    
-                all_chunks.extend(chunks)
-            
-            # Log success
+                pending.append(file_path)
+        return pending
+
+    def _release(self, doc_ids: list):
+        """Frees the text of documents whose chunks are all indexed, and empties doc_ids."""
+        for doc_id in doc_ids:
+            self.store.release(doc_id)
+        doc_ids.clear()
+
+    def _index_batch(self, batch: list, embedder, vector_store) -> int:
+        embeddings = embedder.embed_chunks([c.text for c in batch])
+        vector_store.add_embeddings(embeddings, batch)
+        self.recomputed += len(batch)
+        return len(batch)
+
+    def _iter_file_chunks(self, file_path: str, key: Optional[str], cached, future=None, text: str = None) -> Iterator[Chunk]:
+        ext = os.path.splitext(file_path)[1].lower()
+        if cached is not None:
+            segments = cached
+        elif future is not None:
             try:
-                file_size = os.path.getsize(file_path)
-                self.logger.log_ingestion(os.path.basename(file_path), file_size, "success")
-            except:
-                pass
-                
-        return all_chunks
+                segments = future.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM, crash in OCR) and took the pool down:
+                # files it had not finished are parsed here instead
+                print(f"Warning: A parsing worker died, parsing {file_path} serially")
+                segments = parse_and_segment(file_path, self.topic_extractor, text)
+            self._cache_put(key, segments)
+        elif ext in MEDIA_EXTENSIONS:
+            segments = parse_and_segment(file_path, self.topic_extractor, text)
+            self._cache_put(key, segments)
+        else:
+            yield from self._iter_streamed_chunks(file_path, key)
+            return
+        yield from self._chunk_segments(file_path, segments)
+
+    def _iter_streamed_chunks(self, file_path: str, key: Optional[str]) -> Iterator[Chunk]:
+        """
+        Streams a document through the segmenter and chunker. Segments are
+        recorded for the parse cache unless the document outgrows the cache.
+        """
+        topic_name = fallback_topic(file_path)
+        record = [] if key else None  # [topic, pieces] per segment
+        # Recording holds the document's text, so very large files (e.g. logs)
+        # are not cached rather than kept in memory and evicting everything else
+        budget = self.cache.max_bytes // CACHE_MAX_FILE_SHARE if key else 0
+
+        def segments_stream():
+            nonlocal record, budget
+            for index, topic, piece in self._iter_segments(file_path):
+                if record is not None:
+                    budget -= len(piece)
+                    if budget < 0:
+                        record = None
+                    elif index == len(record):
+                        record.append((topic, [piece]))
+                    else:
+                        record[index][1].append(piece)
+                yield index, topic if topic is not None else topic_name, piece
+
+        yield from iter_chunks(self.store, document_name(file_path, self.root), segments_stream())
+        if record:
+            self._cache_put(key, [{'topic': topic, 'content': ''.join(pieces)} for topic, pieces in record])
+
+    def _iter_segments(self, file_path: str, max_pending: int = 65536) -> Iterator[Tuple[int, str, str]]:
+        """
+        (segment_index, topic, piece) stream for a document.
+        DOCX files whose first Heading 1/2 paragraph comes within `max_pending`
+        chars are split by heading styles; everything else goes through
+        TopicExtractor.iter_segments.
+        """
+        if os.path.splitext(file_path)[1].lower() != '.docx':
+            yield from self.topic_extractor.iter_segments(iter_file(file_path), None, max_pending)
+            return
+
+        try:
+            blocks = iter_docx_blocks(file_path)
+            head = []
+            head_len = 0
+            for block in blocks:
+                head.append(block)
+                if block.heading and block.text.strip():
+                    yield from iter_heading_segments(chain(head, blocks))
+                    return
+                head_len += len(block.text) + 1
+                if head_len > max_pending:
+                    break
+            units = iter_docx_units(chain(head, blocks))
+            yield from self.topic_extractor.iter_segments(units, None, max_pending)
+        except Exception as e:
+            print(f"Error reading DOCX {file_path}: {e}")
+
+    def _chunk_segments(self, file_path: str, segments: List[Dict[str, str]]) -> List[Chunk]:
+        # 3. Chunk per Topic
+        return make_chunks(self.store, document_name(file_path, self.root), resolve_topics(file_path, segments))
+
+    def _segment_files(self, file_paths: list, workers: int) -> list:
+        """
+        Returns segments per file in input order, None for files that failed.
+        Cache hits skip parsing; images among the misses are OCR'd here in
+        one batch through the shared OCR engine, other files are parsed
+        serially or, if there are at least two, in a pool.
+        """
+        keys = [self._cache_key(p) for p in file_paths]
+        segments_per_file = [self.cache.get(key) if key else None for key in keys]
+        todo = [i for i, segments in enumerate(segments_per_file) if segments is None]
+        paths = [file_paths[i] for i in todo]
+        results = [None] * len(paths)
+        pooled = [j for j, p in enumerate(paths) if not self._is_image(p)]
+
+        workers = min(workers, len(pooled))
+        if any(os.path.splitext(paths[j])[1].lower() in MEDIA_EXTENSIONS for j in pooled):
+            # Each worker loads its own OCR model; keep to one engine's limit
+            workers = min(workers, OCR_MAX_CONCURRENT)
+        if workers > 1:
+            for j, segments in zip(pooled, self._segment_parallel([paths[j] for j in pooled], workers)):
+                results[j] = segments
+        else:
+            for j in pooled:
+                results[j] = self._segment_safe(paths[j])
+        ocr_texts = self._batch_ocr(paths)
+        for j, file_path in enumerate(paths):
+            if self._is_image(file_path):
+                results[j] = self._segment_safe(file_path, ocr_texts.get(file_path))
+
+        for i, segments in zip(todo, results):
+            segments_per_file[i] = segments
+            self._cache_put(keys[i], segments)
+        return segments_per_file
+
+    def _segment_safe(self, file_path: str, text: str = None):
+        """Parses and segments one file. Returns None on failure."""
+        try:
+            return parse_and_segment(file_path, self.topic_extractor, text)
+        except Exception as e:
+            print(f"Error ingesting {file_path}: {e}")
+            return None
+
+    def _segment_parallel(self, file_paths: list, workers: int) -> list:
+        """
+        Parses and segments files in a process pool.
+        Results come back in input order; a failed file yields None.
+        """
+        results = [None] * len(file_paths)
+        broken = []  # files left unfinished by a worker that died
+        try:
+            with parse_pool(workers) as pool:
+                futures = [pool.submit(parse_and_segment, file_path) for file_path in file_paths]
+                for i, future in enumerate(futures):
+                    try:
+                        results[i] = future.result()
+                    except BrokenProcessPool:
+                        broken.append(i)
+                    except Exception as e:
+                        print(f"Error ingesting {file_paths[i]}: {e}")
+                        results[i] = None
+        except Exception as e:
+            # Pool could not start (e.g. restricted environment), fall back to serial
+            print(f"Warning: Parallel ingestion unavailable, running serially: {e}")
+            return [self._segment_safe(file_path) for file_path in file_paths]
+        if broken:
+            # One dead worker breaks the whole pool; the rest of the batch still gets parsed
+            print(f"Warning: A parsing worker died, parsing {len(broken)} remaining file(s) serially")
+            for i in broken:
+                results[i] = self._segment_safe(file_paths[i])
+        return results
+
+    def _is_image(self, file_path: str) -> bool:
+        return os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS
+
+    def _batch_ocr(self, file_paths: list) -> Dict[str, str]:
+        """
+        OCRs all images among file_paths in one batched pass.
+        Returns {path: text}; empty when there are fewer than two images.
+        """
+        images = [p for p in file_paths if self._is_image(p)]
+        if len(images) < 2:
+            return {}
+        try:
+            return dict(zip(images, parse_images(images)))
+        except Exception as e:
+            print(f"Warning: Batched OCR failed, falling back to one image at a time: {e}")
+            return {}
+
+    def _digest(self, file_path: str) -> str:
+        """file_digest, computed once per path."""
+        digest = self._digests.get(file_path)
+        if digest is None:
+            digest = self._digests[file_path] = file_digest(file_path)
+        return digest
+
+    def _cache_key(self, file_path: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        try:
+            return ParseCache.file_key(file_path, self._digest(file_path))
+        except Exception:
+            return None
+
+    def _cache_put(self, key: Optional[str], segments):
+        # Empty results and parser error markers are not cached: they are usually
+        # transient (e.g. OCR engine unavailable)
+        if not key or not segments:
+            return
+        if any(segment['content'].startswith("[Error") for segment in segments):
+            return
+        self.cache.put(key, segments)
+
+    def _log(self, file_path: str, status: str):
+        try:
+            file_size = os.path.getsize(file_path)
+            self.logger.log_ingestion(os.path.basename(file_path), file_size, status)
+        except:
+            pass
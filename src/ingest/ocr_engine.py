@@ -0,0 +1,188 @@
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, NamedTuple
+
+# Defaults for the process-wide engine
+OCR_LANGUAGES = ['en']
+OCR_IDLE_TIMEOUT = 600 # seconds without OCR calls before the model is unloaded
+# Simultaneous readtext calls (each one is CPU and memory heavy). Per process:
+# every ingestion worker process has its own engine and limit
+OCR_MAX_CONCURRENT = 2
+OCR_BATCH_SIZE = 8 # images per detector batch and text boxes per recognizer batch
+
+class OCRResult(NamedTuple):
+    """Text found in one image and its mean confidence (0-1, weighted by text length)."""
+    text: str
+    confidence: float
+
+def _to_result(detections: list) -> OCRResult:
+    """Builds an OCRResult from EasyOCR detail=1 output [(box, text, confidence), ...]."""
+    texts = [d[1] for d in detections]
+    weight = sum(len(t) for t in texts)
+    if not weight:
+        return OCRResult("", 0.0)
+    confidence = sum(len(d[1]) * float(d[2]) for d in detections) / weight
+    return OCRResult(" ".join(texts), confidence)
+
+class OCREngine:
+    """
+    Lazily created EasyOCR reader shared by the image and video parsers.
+    The model is loaded on first use (or by warm_up), unloaded again after
+    `idle_timeout` seconds without calls, and at most `max_concurrent`
+    recognition calls run at the same time.
+    """
+    def __init__(self, languages: list = None, gpu: bool = False,
+                 idle_timeout: float = OCR_IDLE_TIMEOUT, max_concurrent: int = OCR_MAX_CONCURRENT):
+        self.languages = languages or OCR_LANGUAGES
+        self.gpu = gpu
+        self.idle_timeout = idle_timeout
+        self.max_concurrent = max(1, max_concurrent)
+        self._reader = None
+        self._load_failed = False
+        self._load_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._active = 0
+        self._active_lock = threading.Lock()
+        self._idle_timer = None
+        self._warm_up_thread = None
+        self._warm_up_lock = threading.Lock() # not _load_lock, which is held while loading
+        self.load_seconds = None
+
+    def available(self) -> bool:
+        """True if EasyOCR is installed and the model has not failed to load."""
+        return not self._load_failed and importlib.util.find_spec("easyocr") is not None
+
+    def is_loaded(self) -> bool:
+        return self._reader is not None
+
+    def warm_up(self) -> bool:
+        """Loads the model now instead of on the first OCR call. Returns success."""
+        loaded = self._get_reader() is not None
+        self._schedule_unload()
+        return loaded
+
+    def warm_up_in_background(self):
+        """
+        Starts warm_up in a daemon thread, unless the model is loaded or a
+        warm-up is already running (safe to call on every Streamlit rerun).
+        """
+        with self._warm_up_lock:
+            if self._reader is not None or self._load_failed:
+                return
+            if self._warm_up_thread is not None and self._warm_up_thread.is_alive():
+                return
+            self._warm_up_thread = threading.Thread(target=self.warm_up, daemon=True)
+            self._warm_up_thread.start()
+
+    def _get_reader(self):
+        if self._reader is not None:
+            return self._reader
+        with self._load_lock:
+            if self._reader is None and not self._load_failed:
+                start = time.perf_counter()
+                try:
+                    import easyocr
+                    # Using CPU to avoid CUDA issues if not present
+                    self._reader = easyocr.Reader(self.languages, gpu=self.gpu, verbose=False)
+                    self.load_seconds = time.perf_counter() - start
+                except Exception as e:
+                    print(f"Warning: EasyOCR failed to initialize: {e}")
+                    self._load_failed = True
+        return self._reader
+
+    def readtext(self, image, **kwargs) -> list:
+        """
+        Runs reader.readtext on an image path or array.
+        Raises RuntimeError if the OCR engine is not available.
+        """
+        with self._using_reader() as reader:
+            return reader.readtext(image, **kwargs)
+
+    def readtext_batch(self, images: list, batch_size: int = OCR_BATCH_SIZE) -> List[OCRResult]:
+        """
+        OCRs several images (paths or arrays) and returns one OCRResult per
+        image, in input order. Arrays of the same shape (e.g. video frames)
+        go through the detector together via readtext_batched; recognition
+        is batched `batch_size` text boxes at a time in every case.
+        Raises RuntimeError if the OCR engine is not available.
+        """
+        results = [None] * len(images)
+        groups = {}
+        for i, image in enumerate(images):
+            # Paths have no shape until loaded, so they are run one by one
+            shape = getattr(image, 'shape', None)
+            groups.setdefault(shape, []).append(i)
+
+        with self._using_reader() as reader:
+            for shape, indices in groups.items():
+                if shape is None or len(indices) == 1:
+                    for i in indices:
+                        results[i] = _to_result(reader.readtext(images[i], detail=1, batch_size=batch_size))
+                    continue
+                for start in range(0, len(indices), batch_size):
+                    part = indices[start:start + batch_size]
+                    batched = reader.readtext_batched([images[i] for i in part], detail=1, batch_size=batch_size)
+                    for i, detections in zip(part, batched):
+                        results[i] = _to_result(detections)
+        return results
+
+    @contextmanager
+    def _using_reader(self):
+        """Holds a concurrency slot and keeps the model from being unloaded while in use."""
+        with self._slots:
+            with self._active_lock:
+                self._active += 1
+                self._cancel_unload()
+            try:
+                reader = self._get_reader()
+                if reader is None:
+                    raise RuntimeError("OCR Engine not available")
+                yield reader
+            finally:
+                with self._active_lock:
+                    self._active -= 1
+                    idle = self._active == 0
+                if idle:
+                    self._schedule_unload()
+
+    def unload(self):
+        """Drops the model so its memory can be reclaimed; it reloads on next use."""
+        with self._active_lock:
+            if self._active:
+                return
+            self._cancel_unload()
+            with self._load_lock:
+                self._reader = None
+
+    def _schedule_unload(self):
+        if not self.idle_timeout:
+            return
+        with self._active_lock:
+            self._cancel_unload()
+            self._idle_timer = threading.Timer(self.idle_timeout, self.unload)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _cancel_unload(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_ocr_engine(**kwargs) -> OCREngine:
+    """
+    Returns the process-wide OCR engine, creating it on first call.
+    kwargs are passed to OCREngine and only take effect on that first call.
+    Worker processes (e.g. Ingestor's parse pool) each get their own engine,
+    so its max_concurrent doesn't limit OCR across processes.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OCREngine(**kwargs)
+    return _engine
@@ -0,0 +1,157 @@
+import sqlite3
+import hashlib
+import json
+import datetime
+import os
+import threading
+from typing import List, Dict, Optional
+
+# Bump whenever parsing or segmentation output changes so stale entries are ignored
+PARSER_VERSION = "2"
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ParseCache:
+    """
+    Persistent, content-addressed cache of parsed files.
+    Entries are keyed by a hash of the file bytes, the file extension and
+    PARSER_VERSION, and hold the extracted text split into topic segments.
+    The least recently used entries are evicted once the cache grows past
+    `max_bytes`.
+    """
+    def __init__(self, db_path: str = "edubuddy_parse_cache.db", max_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=20)
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                key TEXT PRIMARY KEY,
+                segments TEXT,
+                size_bytes INTEGER,
+                last_access TEXT
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_parse_cache_access ON parse_cache (last_access)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def file_key(file_path: str, digest: str = None) -> str:
+        """
+        Hashes the file bytes together with its extension and the parser version.
+        `digest` is the file's file_digest, if already computed.
+        """
+        if digest is None:
+            digest = file_digest(file_path)
+        ext = os.path.splitext(file_path)[1].lower()
+        return f"{PARSER_VERSION}:{ext}:{digest}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Returns the cached segments for `key`, or None on a miss."""
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20)
+            c = conn.cursor()
+            c.execute('SELECT segments FROM parse_cache WHERE key = ?', (key,))
+            row = c.fetchone()
+            if row is not None:
+                c.execute('UPDATE parse_cache SET last_access = ? WHERE key = ?', (self._now(), key))
+                conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error reading parse cache: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, segments: List[Dict]):
+        """Stores segments under `key` and evicts old entries if over budget."""
+        try:
+            payload = json.dumps(segments)
+            size = len(payload.encode('utf-8'))
+            if size > self.max_bytes:
+                return
+            conn = sqlite3.connect(self.db_path, timeout=20)
+            c = conn.cursor()
+            c.execute('''
+                INSERT OR REPLACE INTO parse_cache (key, segments, size_bytes, last_access)
+                VALUES (?, ?, ?, ?)
+            ''', (key, payload, size, self._now()))
+            self._evict(c)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error writing parse cache: {e}")
+
+    def _evict(self, c):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        c.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM parse_cache')
+        total = c.fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        c.execute('SELECT key, size_bytes FROM parse_cache ORDER BY last_access ASC')
+        stale = []
+        for key, size in c.fetchall():
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        c.executemany('DELETE FROM parse_cache WHERE key = ?', stale)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus the on-disk size."""
+        entries, size = 0, 0
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20)
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM parse_cache')
+            entries, size = c.fetchone()
+            conn.close()
+        except Exception as e:
+            print(f"Error getting parse cache stats: {e}")
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size
+        }
+
+    def clear(self) -> bool:
+        """Deletes every cached entry (e.g. for privacy on reset)."""
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=20)
+            c = conn.cursor()
+            c.execute('DELETE FROM parse_cache')
+            conn.commit()
+            c.execute('VACUUM')
+            conn.close()
+            with self._lock:
+                self.hits = 0
+                self.misses = 0
+            return True
+        except Exception as e:
+            print(f"Error clearing parse cache: {e}")
+            return False
+
+    def _now(self) -> str:
+        # Microsecond resolution keeps LRU order stable for back-to-back accesses
+        return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
@@ -1,18 +1,170 @@
 import pypdf
-from typing import List, Dict, Any
+import os
+import multiprocessing
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, NamedTuple, Iterable, Iterator
 
-def parse_pdf(file_path: str) -> str:
+# Below this many pages the process start-up costs more than it saves
+MIN_PAGES_FOR_PARALLEL = 40
+
+class PdfText(NamedTuple):
     """
-    Extracts text from a PDF file.
+    Extracted PDF text plus per-page offsets.
+    page_offsets[i] is the character offset in `text` where page i starts.
+    Pages without text get the offset where the previous page ended.
+    """
+    text: str
+    page_offsets: List[int]
+
+    def page_at(self, offset: int) -> int:
+        """Returns the 0-based page number containing a character offset."""
+        if not self.page_offsets:
+            return 0
+        return max(0, bisect_right(self.page_offsets, offset) - 1)
+
+def _iter_page_range(reader: pypdf.PdfReader, file_path: str, start: int, end: int) -> Iterator[str]:
+    """
+    Yields the text of pages [start, end); a page that fails to extract
+    yields "" instead of ending the file there.
+    """
+    for page_num in range(start, end):
+        try:
+            yield reader.pages[page_num].extract_text() or ""
+        except Exception as e:
+            print(f"Error reading page {page_num} of {file_path}: {e}")
+            yield ""
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    Extracts pages [start, end) with a reader private to this process.
     """
+    return list(_iter_page_range(pypdf.PdfReader(file_path), file_path, start, end))
+
+def _worker_count(workers: int, num_pages: int) -> int:
+    """Processes to shard a PDF of num_pages across; 1 means serial."""
+    if workers is None:
+        # Already inside a worker (e.g. parallel ingestion): don't nest pools
+        workers = 1 if multiprocessing.parent_process() else (os.cpu_count() or 1)
+    if num_pages < MIN_PAGES_FOR_PARALLEL:
+        return 1
+    return max(1, min(workers, num_pages))
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: forking a process that already runs torch/OCR threads can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+def _page_ranges(num_pages: int, shards: int) -> List[Tuple[int, int]]:
+    """Splits num_pages into `shards` contiguous, near-equal ranges."""
+    size, extra = divmod(num_pages, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
+
+def _join_pages(pages: Iterable[str]) -> PdfText:
+    """Joins page texts with newlines, skipping empty pages, and records offsets."""
     text_parts = []
+    page_offsets = []
+    offset = 0
+    for page_text in pages:
+        offset = _next_offset(offset, page_text, page_offsets)
+        if page_text:
+            text_parts.append(page_text)
+    return PdfText("\n".join(text_parts), page_offsets)
+
+def _next_offset(offset: int, page_text: str, page_offsets: List[int]) -> int:
+    """
+    Records where a page starts in the joined text (after the "\n" before
+    it, if it has text) and returns the offset where it ends.
+    """
+    if page_text and offset:
+        offset += 1 # "\n" separator
+    page_offsets.append(offset)
+    return offset + len(page_text)
+
+def extract_pdf_text(file_path: str, workers: int = None) -> PdfText:
+    """
+    Extracts text from a PDF, sharding page ranges across worker processes.
+    Each worker opens its own reader; results are joined in page order.
+    workers=None picks one per CPU; workers=1 extracts serially.
+    """
+    reader = pypdf.PdfReader(file_path)
+    num_pages = len(reader.pages)
+    workers = _worker_count(workers, num_pages)
+
+    if workers <= 1:
+        return _join_pages(_iter_page_range(reader, file_path, 0, num_pages))
+
+    ranges = _page_ranges(num_pages, workers)
+    try:
+        with _pool(workers) as pool:
+            futures = [pool.submit(_extract_page_range, file_path, start, end) for start, end in ranges]
+            pages = []
+            for future in futures:
+                pages.extend(future.result())
+    except Exception as e:
+        print(f"Warning: Parallel PDF extraction failed, running serially: {e}")
+        pages = _extract_page_range(file_path, 0, num_pages)
+    return _join_pages(pages)
+
+def iter_pdf_pages(file_path: str, workers: int = None, page_offsets: List[int] = None) -> Iterator[str]:
+    """
+    Yields the text of each non-empty page in order.
+    Large PDFs are sharded across worker processes like extract_pdf_text
+    and come out one page range at a time, as each finishes in order;
+    others are read one page at a time. A page that fails to extract is
+    skipped, not the rest of the file.
+    If page_offsets is given, the offset of every page in the pages joined
+    with newlines is appended to it as the stream reaches that page, the
+    same offsets extract_pdf_text returns.
+    """
+    if page_offsets is None:
+        page_offsets = []
+    offset = 0
     try:
         reader = pypdf.PdfReader(file_path)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-        text = "\n".join(text_parts)
+        num_pages = len(reader.pages)
+    except Exception as e:
+        print(f"Error reading PDF {file_path}: {e}")
+        return
+    workers = _worker_count(workers, num_pages)
+
+    done = 0  # pages already yielded (or skipped as empty)
+    if workers > 1:
+        pool = None
+        try:
+            pool = _pool(workers)
+            futures = [pool.submit(_extract_page_range, file_path, start, end)
+                       for start, end in _page_ranges(num_pages, workers)]
+            for future in futures:
+                pages = future.result()
+                for page_text in pages:
+                    offset = _next_offset(offset, page_text, page_offsets)
+                    if page_text:
+                        yield page_text
+                done += len(pages)
+        except Exception as e:
+            print(f"Warning: Parallel PDF extraction failed, reading the remaining pages serially: {e}")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    for page_text in _iter_page_range(reader, file_path, done, num_pages):
+        offset = _next_offset(offset, page_text, page_offsets)
+        if page_text:
+            yield page_text
+
+def parse_pdf(file_path: str, workers: int = None) -> str:
+    """
+    Extracts text from a PDF file.
+    """
+    try:
+        text = extract_pdf_text(file_path, workers).text
     except Exception as e:
         print(f"Error reading PDF {file_path}: {e}")
         return ""
@@ -1,29 +1,38 @@
-import docx
 import os
-from .pdf_parser import parse_pdf
-from .image_parser import parse_image
+from typing import Iterator, List
+from .pdf_parser import parse_pdf, iter_pdf_pages
+from .docx_parser import DocxBlock, iter_docx_blocks, iter_docx_units, docx_text
+from .text_reader import iter_text_windows, detect_encoding, DETECT_BYTES
+from .image_parser import parse_image, parse_images
 from .video_parser import parse_video
 
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']
+
 def parse_docx(file_path: str) -> str:
     """
-    Extracts text from a DOCX file.
+    Extracts text from a DOCX file: paragraphs and tables, one per line.
+    """
+    return docx_text(parse_docx_blocks(file_path))
+
+def parse_docx_blocks(file_path: str) -> List[DocxBlock]:
+    """
+    Paragraphs and tables of a DOCX file, with their heading levels.
     """
-    text = ""
     try:
-        doc = docx.Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
+        return list(iter_docx_blocks(file_path))
     except Exception as e:
         print(f"Error reading DOCX {file_path}: {e}")
-        return ""
-    return text
+        return []
 
 def parse_text_file(file_path: str) -> str:
     """
     Extracts text from .txt or .md files.
+    The encoding is detected (see detect_encoding); invalid bytes become U+FFFD.
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'rb') as f:
+            encoding = detect_encoding(f.read(DETECT_BYTES))
+        with open(file_path, 'r', encoding=encoding, errors='replace') as f:
             return f.read()
     except Exception as e:
         print(f"Error reading text file {file_path}: {e}")
@@ -40,10 +49,48 @@ def parse_file(file_path: str) -> str:
         return parse_docx(file_path)
     elif ext in ['.txt', '.md', '.py']:
         return parse_text_file(file_path)
-    elif ext in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff']:
+    elif ext in IMAGE_EXTENSIONS:
         return parse_image(file_path)
     elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
         return parse_video(file_path)
     else:
         print(f"Unsupported file type: {ext}")
         return ""
+
+def iter_docx(file_path: str) -> Iterator[str]:
+    """
+    Yields the text of each DOCX paragraph and table (see iter_docx_units).
+    """
+    try:
+        yield from iter_docx_units(iter_docx_blocks(file_path))
+    except Exception as e:
+        print(f"Error reading DOCX {file_path}: {e}")
+
+def iter_text_file(file_path: str) -> Iterator[str]:
+    """
+    Yields blocks of whole lines of a .txt or .md file, decoded window by
+    window from a memory map (see iter_text_windows), so large files are
+    never held in memory whole.
+    """
+    try:
+        yield from iter_text_windows(file_path)
+    except Exception as e:
+        print(f"Error reading text file {file_path}: {e}")
+
+def iter_file(file_path: str) -> Iterator[str]:
+    """
+    Streaming counterpart of parse_file.
+    Yields text units (pages, paragraphs or lines) which, joined with newlines,
+    give the same text parse_file returns. Media files yield a single unit.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.pdf':
+        yield from iter_pdf_pages(file_path)
+    elif ext == '.docx':
+        yield from iter_docx(file_path)
+    elif ext in ['.txt', '.md', '.py']:
+        yield from iter_text_file(file_path)
+    else:
+        text = parse_file(file_path)
+        if text:
+            yield text
@@ -0,0 +1,100 @@
+import codecs
+import mmap
+import os
+from typing import Iterator
+
+# Bytes decoded per window; the decoded window is the most text held at once
+WINDOW_BYTES = 1024 * 1024
+# Bytes sampled from the start of the file to guess its encoding
+DETECT_BYTES = 64 * 1024
+# Encoding assumed for files that are not valid UTF-8
+FALLBACK_ENCODING = 'cp1252'
+
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+def detect_encoding(head: bytes) -> str:
+    """
+    Guesses the encoding of a file from its first bytes: a BOM if there is
+    one, else UTF-8 if the sample decodes as UTF-8, else FALLBACK_ENCODING.
+    """
+    # UTF-32 LE BOM starts with the UTF-16 LE one, so longer BOMs are checked first
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        # final=False: a multi-byte character cut off at the sample end is fine
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+def _release(data: mmap.mmap, start: int, end: int) -> int:
+    """
+    Drops already decoded pages from the mapping so they stop counting
+    towards this process's RSS (the OS still caches them).
+    Returns the new release offset, page aligned.
+    """
+    end -= end % mmap.PAGESIZE
+    if end > start and hasattr(mmap, 'MADV_DONTNEED'):
+        data.madvise(mmap.MADV_DONTNEED, start, min(end, len(data)) - start)
+        return end
+    return start
+
+def iter_text_windows(file_path: str, window_bytes: int = WINDOW_BYTES, encoding: str = None) -> Iterator[str]:
+    """
+    Decodes a text file through a memory map, `window_bytes` at a time.
+    Yields blocks of whole lines, so joining the blocks with '\\n' gives the
+    file text: blocks end without their last newline, except the final one,
+    which keeps the file's. A line longer than a window is split into
+    pieces instead, and so gains line breaks. Newlines are normalized like
+    text-mode open(); bytes invalid in the encoding become U+FFFD.
+    At most about two windows of decoded text exist at a time; the file
+    itself is paged in and out by the OS.
+    """
+    if os.path.getsize(file_path) == 0:
+        return
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if encoding is None:
+            encoding = detect_encoding(data[:DETECT_BYTES])
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            data.madvise(mmap.MADV_SEQUENTIAL)
+
+        carry = ''  # partial last line of the previous window
+        size = len(data)
+        released = 0  # mapped bytes before this offset have been dropped
+        for start in range(0, size, window_bytes):
+            final = start + window_bytes >= size
+            text = carry + decoder.decode(data[start:start + window_bytes], final=final)
+            released = _release(data, released, start + window_bytes)
+            if not final and text.endswith('\r'):
+                # Might be the first half of a \r\n split across windows
+                carry = '\r'
+                text = text[:-1]
+            else:
+                carry = ''
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+            if final:
+                if text:
+                    yield text
+                return
+            cut = text.rfind('\n')
+            if cut == -1:
+                if carry or not text:
+                    # The line ends at the held-back '\r', or the decoder is
+                    # still holding a partial character
+                    carry = text + carry
+                    continue
+                # A whole window of bytes without a line break: a line longer than
+                # a window (e.g. minified data) is split rather than held whole
+                cut = len(text)
+            carry = text[cut + 1:] + carry
+            yield text[:cut]
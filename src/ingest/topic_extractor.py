@@ -1,5 +1,24 @@
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable, Iterator, Callable
+
+TOC_START_PATTERN = r'^(Table of Contents|Contents|Index)$'
+
+# Compiled once; these run on every line of every document
+TOC_START_RE = re.compile(TOC_START_PATTERN, re.IGNORECASE)
+# Lengths TOC_START_PATTERN can match, to skip the regex for other lines
+TOC_START_LENGTHS = {len('Index'), len('Contents'), len('Table of Contents')}
+# TOC line: (Number/Bullet) (Title) (Dots/Spaces) (PageNum)
+# Handles spaced dots ". . . ." common in PDFs
+TOC_LINE_RE = re.compile(r'^(\d+\.?\s+|Chapter\s+\d+:?\s+|Module\s+\d+:?\s+)(.+?)(?:\s*(?:\. ?){2,}\s*|\s{2,})?(\d+)?$')
+TOC_TRAILER_RE = re.compile(r'[\.\s]{3,}.*$')
+# Dot leaders ("1. Intro . . . . 5") mark a TOC entry rather than a chapter start
+TOC_ENTRY_RE = re.compile(r'\.{4,}|\.{3,}\s*\d+$')
+# e.g. "1005 Gravenstein" - number without a dot
+NUMBERED_WORD_RE = re.compile(r'^\d+\s+[A-Za-z]+')
+
+def is_toc_start(line: str) -> bool:
+    """True if a stripped line opens a table of contents."""
+    return len(line) in TOC_START_LENGTHS and TOC_START_RE.match(line) is not None
 
 class TopicExtractor:
     def __init__(self):
@@ -16,201 +35,376 @@ class TopicExtractor:
             r'^Section\s+\d+.*$',           # Section 1
             r'^Topic\s+\d+.*$'              # Topic 1
         ]
+        # All patterns in one alternation, so a line is scanned once
+        # Re-added IGNORECASE for words like "Introduction"
+        self._header_re = re.compile('|'.join(f'(?:{p})' for p in self.header_patterns), re.IGNORECASE)
 
     def extract_segments(self, text: str) -> List[Dict[str, str]]:
         """
         Splits text into segments based on detected topics/chapters.
         Returns: List of {'topic': 'Topic Name', 'content': '...'}
         """
+        lines = [line.strip() for line in text.split('\n')]
+
         # 1. Try to extract headers from TOC first
-        toc_headers = self._extract_toc_headers(text)
-        
+        toc_headers = self._toc_headers_in(lines)
+
         if toc_headers:
             # Use specific TOC headers for splitting
-            raw_segments = self._split_by_specific_headers(text, toc_headers)
+            raw_segments = self._split_lines(lines, self._specific_header_matcher(toc_headers))
         else:
             # Fallback to generic patterns
-            raw_segments = self._split_by_headers(text)
-        
+            raw_segments = self._split_lines(lines, self._is_header)
+
         if len(raw_segments) <= 1:
-            return [] 
-            
+            return []
+
         # Post-processing: Merge small segments
         # If we used TOC headers, we trust them more, so we skip aggressive merging
         # unless the content is extremely empty.
         merge_threshold = 0 if toc_headers else 300
-        
+
+        # Segments are kept as [topic, parts, length] and joined once at the end
         merged_segments = []
-        current_seg = raw_segments[0]
-        
-        for next_seg in raw_segments[1:]:
+        current_seg = [raw_segments[0]['topic'], [raw_segments[0]['content']], len(raw_segments[0]['content'])]
+
+        for raw_seg in raw_segments[1:]:
+            next_seg = [raw_seg['topic'], [raw_seg['content']], len(raw_seg['content'])]
             # If current segment is too short (likely a false positive header or just intro text), merge it
-            if len(current_seg['content']) < merge_threshold:
+            if current_seg[2] < merge_threshold:
+                topic, parts, length = current_seg
                 if merged_segments:
-                    merged_segments[-1]['content'] += "\n" + current_seg['topic'] + "\n" + current_seg['content']
-                    current_seg = next_seg
+                    previous = merged_segments[-1]
+                    previous[1].append("\n" + topic + "\n")
+                    previous[1].extend(parts)
+                    previous[2] += len(topic) + 2 + length
                 else:
-                    next_seg['content'] = current_seg['topic'] + "\n" + current_seg['content'] + "\n" + next_seg['content']
-                    current_seg = next_seg
+                    next_seg[1] = [topic + "\n"] + parts + ["\n"] + next_seg[1]
+                    next_seg[2] += len(topic) + 2 + length
             else:
                 merged_segments.append(current_seg)
-                current_seg = next_seg
-                
+            current_seg = next_seg
+
         merged_segments.append(current_seg)
-        return merged_segments
+        return [{'topic': topic, 'content': ''.join(parts)} for topic, parts, _ in merged_segments]
+
+    def iter_segments(self, units: Iterable[str], fallback_topic: str = None, max_pending: int = 65536) -> Iterator[Tuple[int, str, str]]:
+        """
+        Streaming counterpart of extract_segments.
+        Consumes text units (pages, paragraphs, lines) and yields
+        (segment_index, topic, piece) tuples. Pieces of one segment are yielded
+        consecutively; joining them gives the segment content.
+
+        Nothing is yielded until the text has shown two header-delimited
+        segments: with fewer, extract_segments finds no topics and the whole
+        text becomes one segment under `fallback_topic`, as yielded here at
+        the end. Joining the units with newlines, the result then equals
+        extract_segments(text) or [{'topic': fallback_topic, 'content': text}].
+
+        Differences from extract_segments, which sees the whole text up front:
+        - At most `max_pending` chars are held back. If that is not enough
+          to tell, streaming goes on as if there were several segments; text
+          before the first header then goes under `fallback_topic` instead
+          of "Introduction".
+        - A TOC only switches header matching to its entries from the point
+          where the TOC block ends.
+        """
+        stream = _SegmentStream(merge_threshold=300)
+        pending = []  # raw lines seen before the first header
+        pending_len = 0
+        started = False
+        toc_headers = None  # entries of the TOC block being read
+        is_header_line = self._is_header  # switched to the TOC headers once a TOC has been read
+        # Until the second segment shows up, output is held with the raw lines it came from
+        held_events = []
+        held_lines = []
+        held_len = 0
+        holding = True
+        # Segments extract_segments' split would have found so far (headers followed by content)
+        raw_segments = 0
+        in_content = False
+
+        for unit in units:
+            for raw_line in unit.split('\n'):
+                line = raw_line.strip()
+                events = []
+
+                if toc_headers is not None and line:
+                    full_header = self._parse_toc_line(line) if len(line) <= 300 else None
+                    if full_header is not None and len(toc_headers) <= 30:
+                        toc_headers.append(full_header)
+                    elif toc_headers or len(line) > 300:
+                        # First line after the entries ends the TOC block
+                        if toc_headers:
+                            is_header_line = self._specific_header_matcher(toc_headers)
+                            # TOC headers are trusted, so stop merging small segments
+                            stream.merge_threshold = 0
+                        toc_headers = None
+
+                if line and is_toc_start(line):
+                    toc_headers = []
+
+                is_header = bool(line) and is_header_line(line)
+                if is_header:
+                    in_content = False
+                elif not in_content:
+                    in_content = True
+                    raw_segments += 1
+
+                if not started:
+                    if not is_header:
+                        pending.append(raw_line)
+                        pending_len += len(raw_line) + 1
+                        if pending_len > max_pending:
+                            # No header near the start: don't hold the whole document
+                            events += stream.start(fallback_topic)
+                    elif pending:
+                        events += stream.start("Introduction")
+                    if is_header or pending_len > max_pending:
+                        for pending_line in pending:
+                            events += stream.add(pending_line.strip())
+                        pending = []
+                        started = True
+                        if is_header:
+                            events += stream.start(line)
+                elif is_header:
+                    events += stream.start(line)
+                else:
+                    events += stream.add(line)
+
+                if holding:
+                    held_events += events
+                    held_lines.append(raw_line)
+                    held_len += len(raw_line) + 1
+                    if raw_segments >= 2 or held_len > max_pending:
+                        holding = False
+                        yield from held_events
+                        held_events = held_lines = None
+                else:
+                    yield from events
+
+        if holding:
+            # Fewer than two segments: the whole text is one, like extract_segments' fallback
+            if held_lines:
+                yield (0, fallback_topic, '\n'.join(held_lines))
+            return
+        yield from stream.finish()
 
     def _extract_toc_headers(self, text: str) -> List[str]:
         """Scans text for a Table of Contents and extracts chapter titles."""
-        lines = text.split('\n')
+        return self._toc_headers_in([line.strip() for line in text.split('\n')])
+
+    def _toc_headers_in(self, lines: List[str]) -> List[str]:
+        """_extract_toc_headers over already stripped lines."""
         toc_headers = []
         in_toc = False
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
+
+        for line in lines:
             if not line: continue
-            
+
             # Detect TOC start
-            if re.match(r'^(Table of Contents|Contents|Index)$', line, re.IGNORECASE):
+            if is_toc_start(line):
                 in_toc = True
                 continue
-            
+
             if in_toc:
-                # Stop if we hit a long block of text or end of likely TOC
                 # Stop if we hit end of likely TOC (e.g. very long line that is NOT a TOC entry)
-                # We won't use hard length limit anymore, but we check if it matches TOC pattern.
-                if len(line) > 300: # Increase limit significantly just in case
+                if len(line) > 300:
                     in_toc = False
                     continue # Don't break, just stop current TOC block. Allows finding real TOC later if first was false positive.
-                
+
                 # Heuristic: TOC entries often end with a number (page num) or look like "1. Title"
                 # Match "1. Title ... 5" or "Chapter 1: Title"
                 # We want to extract the "Title" part to use as a header later.
-                
-                # Regex for TOC line: (Number/Bullet) (Title) (Dots/Spaces) (PageNum)
-                # Updated to handle spaced dots ". . . ." common in PDFs
-                match = re.match(r'^(\d+\.?\s+|Chapter\s+\d+:?\s+|Module\s+\d+:?\s+)(.+?)(?:\s*(?:\. ?){2,}\s*|\s{2,})?(\d+)?$', line)
-                if match:
-                    # Construct the full header string to look for in body
-                    # We might just use the title, but better to use the full prefix + title for uniqueness
-                    prefix = match.group(1).strip()
-                    title = match.group(2).strip()
-                    full_header = f"{prefix} {title}"
-                    # Clean up dots/page nums if they got into title
-                    full_header = re.sub(r'[\.\s]{3,}.*$', '', full_header).strip()
+                full_header = self._parse_toc_line(line)
+                if full_header is not None:
                     toc_headers.append(full_header)
-                
-                # Stop scanning TOC if we have too many empty lines or weird content? 
-                # For now, let's limit TOC scan to ~50 lines after start
+
+                # Limit TOC scan to ~30 entries
                 if len(toc_headers) > 30:
                     break
-                    
+
         return toc_headers
 
-    def _split_by_specific_headers(self, text: str, headers: List[str]) -> List[Dict[str, str]]:
-        """Splits text using a specific list of known headers."""
-        lines = text.split('\n')
-        segments = []
-        current_topic = "Introduction"
-        current_content = []
-        
-        # Create a regex pattern that matches any of the known headers exactly
+    def _parse_toc_line(self, line: str):
+        """Returns the header a TOC entry points to, or None if the line is not a TOC entry."""
+        match = TOC_LINE_RE.match(line)
+        if not match:
+            return None
+        # Construct the full header string to look for in body
+        # We might just use the title, but better to use the full prefix + title for uniqueness
+        prefix = match.group(1).strip()
+        title = match.group(2).strip()
+        full_header = f"{prefix} {title}"
+        # Clean up dots/page nums if they got into title
+        return TOC_TRAILER_RE.sub('', full_header).strip()
+
+    def _specific_header_matcher(self, headers: List[str]) -> Callable[[str], bool]:
+        """
+        Returns a check for stripped, non-empty lines that start with one of
+        the known headers (case-insensitive).
+        ASCII lines are looked up by prefix in a set of lowercased headers, one
+        probe per distinct header length. Anything else goes through the
+        equivalent regex, since re's case folding differs from str.lower()
+        outside ASCII.
+        """
         escaped_headers = [re.escape(h) for h in headers]
         # Sort by length descending to match longest headers first
         escaped_headers.sort(key=len, reverse=True)
-        pattern = r'^(' + '|'.join(escaped_headers) + r').*$'
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                current_content.append(line)
-                continue
-                
+        pattern = re.compile(r'^(' + '|'.join(escaped_headers) + r').*$', re.IGNORECASE)
+
+        ascii_headers = all(h.isascii() for h in headers)
+        prefixes = {h.lower() for h in headers}
+        lengths = sorted({len(h) for h in headers})
+
+        def is_specific_header(line: str) -> bool:
+            # Extra sanity check: Line shouldn't be too long compared to header
+            # (avoids matching "Chapter 1" inside a very long sentence starting with it)
+            if len(line) > 100:
+                return False
+            if ascii_headers and line.isascii():
+                lower = line.lower()
+                if not any(lower[:length] in prefixes for length in lengths if length <= len(line)):
+                    return False
+            elif pattern.match(line) is None:
+                return False
             # SKIP TOC lines (e.g. "1. Intro . . . . 5")
             # If the line ends with digits or has many dots, it's likely a TOC entry, not a chapter start
-            if re.search(r'\.{3,}\s*\d+$', line) or re.search(r'\.{4,}', line):
-                current_content.append(line)
-                continue
+            return not ('...' in line and TOC_ENTRY_RE.search(line))
 
-            # Check if line matches one of our specific headers
-            if re.match(pattern, line, re.IGNORECASE):
-                # Extra sanity check: Line shouldn't be too long compared to header
-                # (avoids matching "Chapter 1" inside a very long sentence starting with it)
-                if len(line) > 100:
-                    current_content.append(line)
-                    continue
+        return is_specific_header
 
-                 # Save previous segment
-                if current_content:
-                    segments.append({
-                        'topic': current_topic,
-                        'content': '\n'.join(current_content)
-                    })
-                
-                # Start new segment
-                current_topic = line
-                current_content = []
-            else:
-                current_content.append(line)
-        
-        if current_content:
-            segments.append({
-                'topic': current_topic,
-                'content': '\n'.join(current_content)
-            })
-            
-        return segments
+    def _split_by_specific_headers(self, text: str, headers: List[str]) -> List[Dict[str, str]]:
+        """Splits text using a specific list of known headers."""
+        lines = [line.strip() for line in text.split('\n')]
+        return self._split_lines(lines, self._specific_header_matcher(headers))
 
     def _split_by_headers(self, text: str) -> List[Dict[str, str]]:
-        lines = text.split('\n')
+        lines = [line.strip() for line in text.split('\n')]
+        return self._split_lines(lines, self._is_header)
+
+    def _split_lines(self, lines: List[str], is_header: Callable[[str], bool]) -> List[Dict[str, str]]:
+        """Splits stripped lines into segments at lines for which is_header is true."""
         segments = []
-        current_topic = "Introduction" 
+        current_topic = "Introduction"
         current_content = []
-        
+
         for line in lines:
-            line = line.strip()
-            if not line:
-                current_content.append(line)
-                continue
-                
-            if self._is_header(line):
+            if line and is_header(line):
                 # Save previous segment
                 if current_content:
                     segments.append({
                         'topic': current_topic,
                         'content': '\n'.join(current_content)
                     })
-                
+
                 # Start new segment
                 current_topic = line
                 current_content = []
             else:
                 current_content.append(line)
-        
+
         if current_content:
             segments.append({
                 'topic': current_topic,
                 'content': '\n'.join(current_content)
             })
-            
+
         return segments
 
     def _is_header(self, line: str) -> bool:
         if len(line) > 80: # Stricter length check
             return False
-            
+
         # Must not end with punctuation like . or , (unless it's a number like 1.)
-        if line[-1] in [',', ';', ':']:
+        if line[-1] in ',;:':
             return False
-            
+
         # Blacklist specific patterns (garbage headers)
         if '|' in line: # e.g. "10 | Chapter 1"
             return False
-        if re.match(r'^\d+\s+[A-Za-z]+', line) and '.' not in line[:5]: # e.g. "1005 Gravenstein" - No dot after number
+        if '.' not in line[:5] and NUMBERED_WORD_RE.match(line): # e.g. "1005 Gravenstein" - No dot after number
             return False
         if "Page" in line and len(line) < 15: # e.g. "Page 1"
             return False
-            
-        for pattern in self.header_patterns:
-            if re.match(pattern, line, re.IGNORECASE): # Re-added IGNORECASE for words like "Introduction"
-                return True
-        return False
+
+        return self._header_re.match(line) is not None
+
+class _SegmentStream:
+    """
+    Incremental version of the raw-segment merge in extract_segments.
+    A segment is held back only until it is long enough to survive merging,
+    so at most `merge_threshold` characters are buffered at a time.
+    """
+    def __init__(self, merge_threshold: int):
+        self.merge_threshold = merge_threshold
+        self.index = -1  # index of the last segment emitted downstream
+        self.open_topic = None
+        self.carry = None  # short leading segment to prepend to the next one
+        self.deferred = None  # short closed segment, merged once another segment shows up
+        self._reset(None)
+
+    def _reset(self, topic):
+        self.topic = topic
+        self.held = []
+        self.held_len = 0
+        self.num_lines = 0
+        self.committed = False
+
+    def start(self, topic: str) -> List[Tuple[int, str, str]]:
+        """Closes the current raw segment and opens a new one under `topic`."""
+        if self.num_lines and not self.committed:
+            # Too short so far; whether it merges depends on whether it was the last one
+            self.deferred = (self.topic, self._content())
+        self._reset(topic)
+        return []
+
+    def add(self, line: str) -> List[Tuple[int, str, str]]:
+        events = []
+        if self.num_lines == 0 and self.deferred:
+            events = self._merge_deferred()
+        piece = line if self.num_lines == 0 else '\n' + line
+        self.num_lines += 1
+        if self.committed:
+            events.append((self.index, self.topic, piece))
+            return events
+        self.held.append(piece)
+        self.held_len += len(piece)
+        content_len = self.held_len + (len(self.carry) + 1 if self.carry is not None else 0)
+        if content_len >= self.merge_threshold:
+            events.extend(self._commit(self.topic, self._content()))
+            self.committed = True
+        return events
+
+    def finish(self) -> List[Tuple[int, str, str]]:
+        # The last segment is always kept
+        if self.num_lines and not self.committed:
+            return self._commit(self.topic, self._content())
+        if self.num_lines == 0 and self.deferred:
+            topic, content = self.deferred
+            self.deferred = None
+            return self._commit(topic, content)
+        return []
+
+    def _content(self) -> str:
+        content = ''.join(self.held)
+        self.held = []
+        if self.carry is not None:
+            content = self.carry + '\n' + content
+            self.carry = None
+        return content
+
+    def _commit(self, topic: str, content: str) -> List[Tuple[int, str, str]]:
+        self.index += 1
+        self.open_topic = topic
+        return [(self.index, topic, content)]
+
+    def _merge_deferred(self) -> List[Tuple[int, str, str]]:
+        topic, content = self.deferred
+        self.deferred = None
+        if self.index >= 0:
+            # Merge into the previous segment
+            return [(self.index, self.open_topic, '\n' + topic + '\n' + content)]
+        # Nothing before it: prepend to the next segment
+        self.carry = topic + '\n' + content
+        return []
@@ -1,70 +1,136 @@
 try:
     import cv2
-    import easyocr
     import numpy as np
 except ImportError:
     cv2 = None
-    easyocr = None
     np = None
 import os
+from typing import Iterator, Tuple
 
-# Re-use the reader from image_parser if possible, or init new one
-reader = None
-if easyocr:
-    try:
-        reader = easyocr.Reader(['en'], gpu=False, verbose=False)
-    except:
-        reader = None
+from .ocr_engine import get_ocr_engine, OCR_BATCH_SIZE
+from .image_parser import load_gray, ocr_tiered
 
-def parse_video(file_path: str, interval_seconds: int = 5) -> str:
+# Frames are compared as small grayscale thumbnails. A thumbnail pixel counts as
+# changed if it moved by more than PIXEL_CHANGE_DELTA grey levels, and the frame
+# is a new scene (e.g. a new slide) if more than SCENE_CHANGE_THRESHOLD of the
+# pixels changed. Slides often differ only by a few words, so both are low.
+SIGNATURE_SIZE = (96, 54)
+PIXEL_CHANGE_DELTA = 32
+SCENE_CHANGE_THRESHOLD = 0.002
+# Seek instead of grabbing when samples are at least this many frames apart
+SEEK_MIN_FRAME_GAP = 48
+
+def iter_sampled_frames(cap, frame_interval: int, seek: bool = None) -> Iterator[Tuple[int, "np.ndarray"]]:
+    """
+    Yields (frame_index, frame) for every `frame_interval`-th frame.
+    Skipped frames are never converted into images: they are either
+    jumped over with a seek or advanced past with grab().
+    seek=None seeks when samples are far apart and the container reports
+    a frame count, and grabs otherwise.
+    """
+    frame_interval = max(1, frame_interval)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if seek is None:
+        seek = total_frames > 0 and frame_interval >= SEEK_MIN_FRAME_GAP
+
+    if seek and total_frames > 0:
+        for frame_index in range(0, total_frames, frame_interval):
+            if not cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index):
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_index, frame
+        return
+
+    frame_index = 0
+    while True:
+        if frame_index % frame_interval == 0:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_index, frame
+        elif not cap.grab():
+            break
+        frame_index += 1
+
+def frame_signature(frame) -> "np.ndarray":
+    """Tiny grayscale thumbnail used to compare frames cheaply."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+def scene_changed(previous, current, threshold: float = SCENE_CHANGE_THRESHOLD) -> bool:
+    """True if two frame signatures differ enough to be a new scene/slide."""
+    if previous is None:
+        return True
+    changed = np.abs(current - previous) > PIXEL_CHANGE_DELTA
+    return float(np.mean(changed)) > threshold
+
+def parse_video(file_path: str, interval_seconds: int = 5, seek: bool = None,
+                change_threshold: float = SCENE_CHANGE_THRESHOLD, batch_size: int = OCR_BATCH_SIZE) -> str:
     """
     Extracts text from video frames at specified intervals using OCR.
+    A sampled frame is only OCR'd if it differs from the last OCR'd frame
+    by more than `change_threshold`, and consecutive identical texts are
+    collapsed into one [Time: ...] block. Changed frames are OCR'd in
+    batches of `batch_size`.
     """
-    if not reader:
+    engine = get_ocr_engine()
+    if not engine.available():
         return "[Error: OCR Engine not available]"
-    
+
     if cv2 is None:
         return "[Error: OpenCV not available]"
 
     text_content = []
     cap = cv2.VideoCapture(file_path)
-    
+
     if not cap.isOpened():
         return "[Error: Could not open video file]"
 
     fps = cap.get(cv2.CAP_PROP_FPS)
     if fps == 0: fps = 24 # Fallback
-    
+
     frame_interval = int(fps * interval_seconds)
-    frame_count = 0
-    
+    last_signature = None
+    last_text = None
+    batch = [] # (frame_count, grayscale frame) waiting for OCR
+
+    def flush():
+        nonlocal last_text
+        try:
+            # Same cheap-first preprocessing as images: only low-confidence frames get denoised
+            results = ocr_tiered(engine, [gray for _, gray in batch], batch_size)
+        except Exception as e:
+            print(f"Error OCRing frames {batch[0][0]}-{batch[-1][0]}: {e}")
+            results = []
+        for (frame_count, _), result in zip(batch, results):
+            frame_text = result.text
+            if frame_text.strip() and frame_text != last_text:
+                timestamp = frame_count / fps
+                text_content.append(f"[Time: {timestamp:.1f}s] {frame_text}")
+                last_text = frame_text
+        batch.clear()
+
     print(f"Processing video {file_path} every {interval_seconds} seconds...")
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        if frame_count % frame_interval == 0:
-            try:
-                # Convert to grayscale for preprocessing (similar to image_parser)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                # Denoise
-                denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-                # Threshold
-                processed_frame = cv2.adaptiveThreshold(
-                    denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-                )
-                
-                result = reader.readtext(processed_frame, detail=0)
-                frame_text = " ".join(result)
-                if frame_text.strip():
-                    timestamp = frame_count / fps
-                    text_content.append(f"[Time: {timestamp:.1f}s] {frame_text}")
-            except Exception as e:
-                print(f"Error OCRing frame at {frame_count}: {e}")
-        
-        frame_count += 1
+
+    for frame_count, frame in iter_sampled_frames(cap, frame_interval, seek):
+        try:
+            signature = frame_signature(frame)
+            if not scene_changed(last_signature, signature, change_threshold):
+                continue
+            last_signature = signature
+
+            # Grayscale + downscale; binarization happens per tier in ocr_tiered
+            batch.append((frame_count, load_gray(frame)))
+        except Exception as e:
+            print(f"Error preprocessing frame at {frame_count}: {e}")
+
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
 
     cap.release()
     return "\n".join(text_content)
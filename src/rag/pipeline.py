@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 from .retriever import Retriever
 from .generator import Generator
 
@@ -7,12 +7,12 @@ class RAGPipeline:
         self.retriever = retriever
         self.generator = generator
 
-    def answer(self, query: str) -> Dict[str, str]:
+    def answer(self, query: str, topic: Optional[str] = None) -> Dict[str, str]:
         """
-        End-to-end QA pipeline.
+        End-to-end QA pipeline, optionally answering from one topic only.
         """
         # 1. Retrieve
-        context_chunks = self.retriever.retrieve(query)
+        context_chunks = self.retriever.retrieve(query, topic=topic)
         
         # 2. Generate
         answer = self.generator.generate_answer(query, context_chunks)
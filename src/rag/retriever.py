@@ -1,24 +1,118 @@
-from typing import List, Dict, Tuple
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional
+import numpy as np
 from ..embed.embedder import Embedder
 from ..embed.indexer import VectorStore
+from ..embed.embedding_cache import normalize_text
+from ..ingest.chunk import ChunkFields
+
+# Query embeddings kept in memory (384 float32 each, ~1.5 KB)
+QUERY_CACHE_SIZE = 1024
+
+def query_key(query: str, lowercase: bool = False) -> str:
+    """
+    normalize_text, lowercased if the model's tokenizer lowercases its input
+    (see Embedder.lowercases_input): for the default all-MiniLM-L6-v2,
+    "What is ML?" and "what is ml?" get the same embedding. Cased models
+    keep the case.
+    """
+    key = normalize_text(query)
+    return key.lower() if lowercase else key
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU of query embeddings keyed by (model name, lowercase,
+    query_key(query, lowercase)).
+    One instance is shared by every Retriever, so all Streamlit sessions
+    benefit from questions asked before.
+    """
+    def __init__(self, capacity: int = QUERY_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, query: str, lowercase: bool = False) -> Optional[np.ndarray]:
+        key = (model_name, lowercase, query_key(query, lowercase))
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, model_name: str, query: str, embedding: np.ndarray, lowercase: bool = False):
+        # Shared between callers, so it must not be modified in place
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        key = (model_name, lowercase, query_key(query, lowercase))
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate(),
+                "entries": len(self._entries),
+                "capacity": self.capacity
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+# Process-wide cache used by default
+query_cache = QueryEmbeddingCache()
 
 class Retriever:
-    def __init__(self, embedder: Embedder, vector_store: VectorStore):
+    def __init__(self, embedder: Embedder, vector_store: VectorStore,
+                 cache: Optional[QueryEmbeddingCache] = None):
         self.embedder = embedder
         self.vector_store = vector_store
+        self.cache = cache if cache is not None else query_cache
 
-    def retrieve(self, query: str, k: int = 3) -> List[Dict]:
+    def embed_query(self, query: str) -> np.ndarray:
         """
-        Retrieves top k relevant chunks for a given query.
+        Embeds a query, reusing the embedding of an identical earlier query.
+        """
+        model_name = getattr(self.embedder, 'model_name', None)
+        lowercase = getattr(self.embedder, 'lowercases_input', False)
+        embedding = self.cache.get(model_name, query, lowercase)
+        if embedding is None:
+            embedding = self.embedder.embed_text(query)
+            self.cache.put(model_name, query, embedding, lowercase)
+        return embedding
+
+    def retrieve(self, query: str, k: int = 3, source: Optional[str] = None,
+                 topic: Optional[str] = None) -> List[Dict]:
         """
-        query_embedding = self.embedder.embed_text(query)
-        results = self.vector_store.search(query_embedding, k)
-        
+        Retrieves top k relevant chunks for a given query,
+        optionally only from one source and/or topic.
+        """
+        query_embedding = self.embed_query(query)
+        results = self.vector_store.search(query_embedding, k, source=source, topic=topic)
+
         # Flatten results to just return metadata (which contains text)
         retrieved_chunks = []
         for metadata, score in results:
-            chunk_data = metadata.copy()
+            # Chunk records materialize their text only here, for the k hits
+            chunk_data = metadata.to_dict() if isinstance(metadata, ChunkFields) else metadata.copy()
             chunk_data['score'] = score
             retrieved_chunks.append(chunk_data)
-            
+
         return retrieved_chunks
@@ -1,6 +1,10 @@
 import random
 import re
 from typing import List, Dict
+from ..embed.metadata_store import ChunkView
+
+# Chunks sampled for the distractor word pool when choosing from a large store
+DISTRACTOR_CHUNKS = 500
 
 class QuizGenerator:
     def __init__(self):
@@ -8,18 +12,30 @@ class QuizGenerator:
 
     def generate_mcq(self, documents: List[Dict], num_questions: int = 5) -> List[Dict]:
         """
-        Generates MCQs from a list of document chunks (dicts with 'text' and 'source').
+        Generates MCQs from a list of document chunks (Chunks or dicts with 'text' and 'source'),
+        or a ChunkView of the vector store, whose texts are only read for the chunks used.
         Returns questions with 'source' metadata.
         """
         if not documents:
             return []
 
         # Filter chunks that are long enough
-        valid_docs = [d for d in documents if len(d['text']) > 50]
-        if not valid_docs:
+        if isinstance(documents, ChunkView):
+            # From the text offsets (UTF-8 bytes), without decoding anything
+            valid_docs = documents.longer_than(50)
+        else:
+            valid_docs = [d for d in documents if len(d['text']) > 50]
+        if not len(valid_docs):
             valid_docs = documents
 
         selected_docs = random.sample(valid_docs, min(num_questions, len(valid_docs)))
+
+        # Distractor pool from (a sample of) all docs, built once instead of per question
+        pool_docs = documents
+        if isinstance(documents, ChunkView) and len(documents) > DISTRACTOR_CHUNKS:
+            pool_docs = random.sample(documents, DISTRACTOR_CHUNKS)
+        all_text = " ".join([d['text'] for d in pool_docs])
+        all_words = [w for w in all_text.split() if len(w) > 5 and w.isalpha()]
         
         quiz = []
         for doc in selected_docs:
@@ -44,9 +60,8 @@ class QuizGenerator:
             question_text = sentence.replace(answer, "______")
             
             # Generate distractors from ALL docs to ensure variety
-            all_text = " ".join([d['text'] for d in documents])
-            all_words = [w for w in all_text.split() if len(w) > 5 and w.isalpha() and w != answer]
-            distractors = random.sample(all_words, 3) if len(all_words) >= 3 else ["Option A", "Option B", "Option C"]
+            pool = [w for w in all_words if w != answer]
+            distractors = random.sample(pool, 3) if len(pool) >= 3 else ["Option A", "Option B", "Option C"]
             
             options = distractors + [answer]
             random.shuffle(options)
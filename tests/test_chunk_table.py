@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.embed import metadata_store
+from src.embed.metadata_store import ChunkTable
+
+def chunks(source: str, revision: int, count: int = 50):
+    return [{"text": f"{source} rev {revision} chunk {i} " + "x" * 200,
+             "metadata": {"source": source, "chunk_index": i, "topic": "T"}}
+            for i in range(count)]
+
+def texts(table: ChunkTable, source: str):
+    return sorted(table.text(int(row)) for row in table.rows(source=source))
+
+def test_reuploads_keep_the_text_tail_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_store, "COMPACT_BYTES", 64 * 1024)
+    table = ChunkTable()
+    table.append(range(50), chunks("keep.txt", 0))
+    table.save(str(tmp_path))
+    table = ChunkTable.load(str(tmp_path))
+
+    next_id, sizes = 50, []
+    for revision in range(40):
+        # Re-uploading a document replaces all of its rows
+        table.remove(table.rows(source="notes.txt"))
+        table.append(range(next_id, next_id + 50), chunks("notes.txt", revision))
+        next_id += 50
+        sizes.append(len(table._tail))
+
+    assert max(sizes) < 3 * 64 * 1024
+    assert texts(table, "notes.txt") == sorted(c["text"] for c in chunks("notes.txt", 39))
+    assert texts(table, "keep.txt") == sorted(c["text"] for c in chunks("keep.txt", 0))
+    assert len(table) == 100
+
+    table.save(str(tmp_path))
+    reloaded = ChunkTable.load(str(tmp_path))
+    assert texts(reloaded, "notes.txt") == texts(table, "notes.txt")
+    assert np.array_equal(reloaded.rows_of(np.array([51, next_id - 1])) >= 0, [False, True])
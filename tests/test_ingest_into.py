@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+# The ingestor pulls in the summarizer through src.utils (transformers)
+ingestor = pytest.importorskip("src.ingest.ingestor")
+
+from src.embed.indexer import VectorStore
+
+DIMENSION = 8
+
+class FakeEmbedder:
+    def embed_chunks(self, chunks):
+        return np.ones((len(chunks), DIMENSION), dtype='float32')
+
+def write_notes(tmp_path, count: int, lines: int = 400):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"notes_{i}.txt"
+        path.write_text(''.join(f"Note {i}.{j}: gradient descent follows the slope\n" for j in range(lines)))
+        paths.append(str(path))
+    return paths
+
+def texts_of(vector_store, source: str):
+    return [record.text for record in sorted(vector_store.chunks_where(source=source), key=lambda r: r.index)]
+
+def held_chars(store) -> int:
+    return sum(buffer.length for buffer in store.buffers)
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # Ingestor's AnalyticsLogger creates edubuddy_users.db in the working directory
+    monkeypatch.chdir(tmp_path)
+
+def test_documents_are_released_once_indexed(tmp_path):
+    paths = write_notes(tmp_path, 6)
+    ingest = ingestor.Ingestor()
+    vector_store = VectorStore(DIMENSION)
+    held = []
+    total = ingest.ingest_into(paths, FakeEmbedder(), vector_store, batch_size=8,
+                               on_batch=lambda _: held.append(held_chars(ingest.store)))
+
+    assert total == len(vector_store) > 0
+    assert held_chars(ingest.store) == 0
+    # Only the document being streamed (and the one before it) is held at a time
+    largest = max(len(open(p).read()) for p in paths)
+    assert max(held) <= 2 * largest
+    # The index kept its own copy of the text
+    indexed = ''.join(texts_of(vector_store, "notes_0.txt"))
+    assert "Note 0.399" in indexed
+
+def test_revised_document_keeps_reused_text(tmp_path):
+    paths = write_notes(tmp_path, 2)
+    vector_store = VectorStore(DIMENSION)
+    ingestor.Ingestor().ingest_into(paths, FakeEmbedder(), vector_store)
+    before = texts_of(vector_store, "notes_1.txt")
+
+    with open(paths[1], "a") as f:
+        f.write("A new closing note\n")
+    ingest = ingestor.Ingestor()
+    ingest.ingest_into(paths, FakeEmbedder(), vector_store)
+
+    assert ingest.reused > 0
+    assert held_chars(ingest.store) == 0
+    after = texts_of(vector_store, "notes_1.txt")
+    assert after[:ingest.reused] == before[:ingest.reused]
+    assert "A new closing note" in after[-1]
+
+def test_same_file_name_in_two_folders(tmp_path):
+    paths = []
+    for week in ("week1", "week2"):
+        (tmp_path / week).mkdir()
+        path = tmp_path / week / "notes.txt"
+        path.write_text(''.join(f"{week} note {j}: the chain rule\n" for j in range(100)))
+        paths.append(str(path))
+    vector_store = VectorStore(DIMENSION)
+    for _ in range(2):
+        ingestor.Ingestor(root=str(tmp_path)).ingest_into(paths, FakeEmbedder(), vector_store)
+
+    assert vector_store.has_document("week1/notes.txt") and vector_store.has_document("week2/notes.txt")
+    for week, other in (("week1", "week2"), ("week2", "week1")):
+        text = ''.join(texts_of(vector_store, f"{week}/notes.txt"))
+        assert f"{week} note 99" in text
+        assert other not in text
@@ -0,0 +1,58 @@
+import pypdf
+import pytest
+
+fpdf = pytest.importorskip("fpdf")
+
+from src.ingest.pdf_parser import extract_pdf_text, iter_pdf_pages, parse_pdf, MIN_PAGES_FOR_PARALLEL
+
+@pytest.fixture(scope="module")
+def book(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("pdf") / "book.pdf")
+    pdf = fpdf.FPDF()
+    pdf.set_font("Helvetica", size=11)
+    for page_num in range(MIN_PAGES_FOR_PARALLEL + 5):
+        pdf.add_page()
+        if page_num != 7:  # one blank page
+            pdf.cell(0, 10, txt=f"Chapter {page_num // 10 + 1}: Page {page_num + 1}")
+    pdf.output(path)
+    return path
+
+def test_streamed_pages_match_parse_pdf(book):
+    text = parse_pdf(book, workers=1)
+    assert '\n'.join(iter_pdf_pages(book, workers=1)) == text
+
+def test_sharded_pages_match_serial(book):
+    assert '\n'.join(iter_pdf_pages(book, workers=2)) == parse_pdf(book, workers=1)
+    assert parse_pdf(book, workers=2) == parse_pdf(book, workers=1)
+
+def test_failed_page_does_not_cut_off_the_rest(book, monkeypatch):
+    extract_text = pypdf.PageObject.extract_text
+    calls = []
+
+    def failing_third_page(self, *args, **kwargs):
+        calls.append(None)
+        if len(calls) == 3:
+            raise ValueError("broken page")
+        return extract_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(pypdf.PageObject, "extract_text", failing_third_page)
+    pages = list(iter_pdf_pages(book, workers=1))
+    assert "Chapter 1: Page 3" not in pages
+    assert pages[-1] == f"Chapter 5: Page {MIN_PAGES_FOR_PARALLEL + 5}"
+
+def test_page_offsets(book):
+    pdf_text = extract_pdf_text(book, workers=1)
+    assert len(pdf_text.page_offsets) == MIN_PAGES_FOR_PARALLEL + 5
+    for page_num, offset in enumerate(pdf_text.page_offsets):
+        if page_num != 7:
+            assert pdf_text.text.startswith(f"Chapter {page_num // 10 + 1}: Page {page_num + 1}", offset)
+            assert pdf_text.page_at(offset + 3) == page_num
+    # The blank page starts where the page before it ended
+    assert pdf_text.page_offsets[7] == pdf_text.page_offsets[8] - 1
+    assert extract_pdf_text(book, workers=2) == pdf_text
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_streamed_page_offsets(book, workers):
+    page_offsets = []
+    text = '\n'.join(iter_pdf_pages(book, workers=workers, page_offsets=page_offsets))
+    assert (text, page_offsets) == extract_pdf_text(book, workers=1)
@@ -0,0 +1,35 @@
+import random
+
+from src.ingest.chunk import DocumentStore
+from src.ingest.chunker import make_chunks, iter_chunks
+
+def pieces_of(segments, rng):
+    """(segment_index, topic, piece) stream cutting each segment at random points."""
+    for index, segment in enumerate(segments):
+        content = segment['content']
+        start = 0
+        while True:
+            end = min(len(content), start + rng.randint(1, 700))
+            yield index, segment['topic'], content[start:end]
+            if end >= len(content):
+                break
+            start = end
+
+def as_tuples(chunks):
+    return [(c.source, c.topic, c.index, c.text) for c in chunks]
+
+def test_iter_chunks_matches_make_chunks():
+    rng = random.Random(7)
+    for _ in range(300):
+        segments = [
+            {'topic': f"Topic {i}", 'content': ''.join(rng.choice("abc \n") for _ in range(rng.choice([1, 199, 800, 1000, 1001, 2600])))}
+            for i in range(rng.randint(1, 4))
+        ]
+        chunk_size = rng.choice([1000, 300])
+        overlap = rng.choice([200, 0, 50])
+        expected = make_chunks(DocumentStore(), "doc.txt", segments, chunk_size, overlap)
+        streamed = list(iter_chunks(DocumentStore(), "doc.txt", pieces_of(segments, rng), chunk_size, overlap))
+        assert as_tuples(streamed) == as_tuples(expected)
+
+def test_iter_chunks_of_nothing():
+    assert list(iter_chunks(DocumentStore(), "empty.txt", iter([]))) == []
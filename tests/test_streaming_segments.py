@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from src.ingest.topic_extractor import TopicExtractor
+
+HEADERS = ["Chapter 1: Intro", "Chapter 2: Cells", "2. Methods", "Module 3", "Introduction", "  Unit 4 Energy  ", "Appendix"]
+WORDS = ["word", "cell", "energy", "x"]
+
+def batch_segments(extractor, text, fallback_topic=None):
+    """What parse_and_segment gets: extract_segments, or the whole text as one segment."""
+    return extractor.extract_segments(text) or [{'topic': fallback_topic, 'content': text}]
+
+def streamed_segments(extractor, units, fallback_topic=None, max_pending=65536):
+    segments = []
+    for index, topic, piece in extractor.iter_segments(units, fallback_topic, max_pending):
+        if index == len(segments):
+            segments.append({'topic': topic, 'content': piece})
+        else:
+            assert segments[index]['topic'] == topic
+            segments[index]['content'] += piece
+    return segments
+
+def split_units(text, rng):
+    """Splits text at random line boundaries into units that join back with newlines."""
+    lines = text.split('\n')
+    units = []
+    i = 0
+    while i < len(lines):
+        size = rng.randint(1, 4)
+        units.append('\n'.join(lines[i:i + size]))
+        i += size
+    return units
+
+def random_document(rng):
+    lines = []
+    for _ in range(rng.randint(1, 12)):
+        r = rng.random()
+        if r < 0.25:
+            lines.append(rng.choice(HEADERS))
+        elif r < 0.35:
+            lines.append("")
+        else:
+            length = rng.choice([0, 1, 8, 24, 80])
+            lines.append(("  " if rng.random() < 0.2 else "") + " ".join(rng.choice(WORDS) for _ in range(length + 1)))
+    return '\n'.join(lines)
+
+@pytest.mark.parametrize("text", [
+    "Chapter 1: Intro\n" + "body text " * 60,  # single header
+    "Chapter 1: Intro",  # header only
+    "body text " * 60 + "\nChapter 9: Outro",  # trailing header
+    "Chapter 1: Intro\n" + "body " * 80 + "\nChapter 2: More",  # one segment, then a trailing header
+    "Chapter 1: Intro\nChapter 2: Cells\n" + "body " * 80,  # empty first header
+    "   \n",
+    "Chapter 1: Intro\n" + "a " * 200 + "\nChapter 2: Cells\n" + "b " * 200 + "\n",
+    "preface\nChapter 1: Intro\nshort\nChapter 2: Cells\n" + "b " * 200,
+])
+def test_iter_segments_matches_extract_segments(text):
+    extractor = TopicExtractor()
+    expected = batch_segments(extractor, text)
+    assert streamed_segments(extractor, [text]) == expected
+    assert streamed_segments(extractor, text.split('\n')) == expected
+
+def test_iter_segments_matches_extract_segments_fuzzed():
+    extractor = TopicExtractor()
+    rng = random.Random(3)
+    for _ in range(2000):
+        text = random_document(rng)
+        assert streamed_segments(extractor, split_units(text, rng)) == batch_segments(extractor, text), text
+
+def test_iter_segments_without_headers_uses_fallback_topic():
+    extractor = TopicExtractor()
+    text = "no headers here\n  just text  \n"
+    assert list(extractor.iter_segments(text.split('\n'), "notes.txt")) == [(0, "notes.txt", text)]
+
+def test_iter_segments_holds_at_most_max_pending():
+    extractor = TopicExtractor()
+    units = ["x" * 50] * 10
+    consumed = []
+
+    def source():
+        for unit in units:
+            consumed.append(unit)
+            yield unit
+
+    # Past max_pending the text streams out instead of waiting for the end
+    stream = extractor.iter_segments(source(), None, max_pending=100)
+    first = next(stream)
+    assert len(consumed) < len(units)
+    assert ''.join(piece for _, _, piece in [first, *stream]) == '\n'.join(units)
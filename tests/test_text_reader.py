@@ -0,0 +1,55 @@
+import random
+import tracemalloc
+
+import pytest
+
+from src.ingest.text_reader import iter_text_windows
+from src.ingest.text_parser import parse_text_file
+
+# Short lines: at most 72 bytes with their line break, even in UTF-32
+LINES = ["", "a", "plain ascii line", "café crème", "€ 5", "日本語", "\U0001F600 ok", "tab\there"]
+
+def write(tmp_path, data: bytes) -> str:
+    path = tmp_path / "notes.txt"
+    path.write_bytes(data)
+    return str(path)
+
+def random_text(rng, lines):
+    text = ''.join(rng.choice(lines) + rng.choice(["\n", "\r\n", "\r"]) for _ in range(rng.randint(0, 60)))
+    return text if rng.random() < 0.5 else text.rstrip("\r\n")
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "utf-32"])
+def test_windows_match_parse_text_file(tmp_path, encoding):
+    rng = random.Random(encoding)
+    for _ in range(300):
+        path = write(tmp_path, random_text(rng, LINES).encode(encoding))
+        # Windows cut through \r\n pairs, BOMs and multi-byte characters
+        window_bytes = rng.choice([80, 81, 83, 96, 1024])
+        assert '\n'.join(iter_text_windows(path, window_bytes)) == parse_text_file(path)
+
+def test_cp1252_file(tmp_path):
+    rng = random.Random(1252)
+    lines = [line for line in LINES if all(ord(c) < 0x250 or c == "€" for c in line)]
+    for _ in range(200):
+        path = write(tmp_path, random_text(rng, lines).encode("cp1252") + b"\x80\xe9")
+        assert '\n'.join(iter_text_windows(path, rng.choice([64, 65, 97]))) == parse_text_file(path)
+
+def test_long_line_is_split_by_bytes(tmp_path):
+    # 3 bytes per character: a character count would hold the line whole
+    line = "日" * 5000
+    path = write(tmp_path, (line + "\nend\n").encode("utf-8"))
+    blocks = list(iter_text_windows(path, 1024))
+    assert len(blocks) > 10
+    assert '\n'.join(blocks).replace("\n", "") == line + "end"
+    assert max(len(block.encode("utf-8")) for block in blocks) <= 2 * 1024
+
+def test_peak_memory_follows_the_window_not_the_file(tmp_path):
+    path = write(tmp_path, ("café 日本語 notes " * 8 + "\n").encode("utf-8") * 40000)  # ~7 MB
+    tracemalloc.start()
+    try:
+        characters = sum(len(block) for block in iter_text_windows(path, 64 * 1024))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert characters > 4_000_000
+    assert peak < 1024 * 1024
@@ -0,0 +1,71 @@
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from src.embed.indexer import VectorStore, VECTOR_FILE
+
+DIMENSION = 16
+
+def vectors(rng, count: int) -> np.ndarray:
+    return rng.standard_normal((count, DIMENSION)).astype('float32')
+
+def chunks(start: int, count: int, source: str = "notes.txt"):
+    return [{"id": str(i), "text": f"chunk {i}", "metadata": {"source": source, "chunk_index": i, "topic": "T"}}
+            for i in range(start, start + count)]
+
+def digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+@pytest.fixture
+def saved(tmp_path):
+    rng = np.random.default_rng(0)
+    store = VectorStore(DIMENSION, ann_threshold=500, compression='sq8')
+    data = vectors(rng, 800)
+    store.add_embeddings(data, chunks(0, 800))
+    directory = str(tmp_path / "store")
+    store.save(directory)
+    return directory, data
+
+def nearest_text(store: VectorStore, query: np.ndarray) -> str:
+    return store.search(query, 1)[0][0].text
+
+def test_loaded_store_leaves_the_saved_files_alone(saved):
+    directory, data = saved
+    path = os.path.join(directory, VECTOR_FILE)
+    before = digest(path)
+    rng = np.random.default_rng(1)
+
+    first, second = VectorStore(), VectorStore()
+    assert first.load(directory, mmap=True) and second.load(directory, mmap=True)
+    added = {store: vectors(rng, 50) for store in (first, second)}
+    for store, new in added.items():
+        # Both processes get the same ids; neither may overwrite the other's rows
+        store.add_embeddings(new, chunks(800, 50, source="more.txt"))
+    assert digest(path) == before
+
+    for store, new in added.items():
+        assert nearest_text(store, new[7]) == "chunk 807"
+        assert nearest_text(store, data[3]) == "chunk 3"
+        assert np.allclose(store.vector_file.read(np.array([3, 807])), [data[3], new[7]], atol=1e-2)
+
+def test_save_after_load_keeps_all_rows(saved, tmp_path):
+    directory, data = saved
+    rng = np.random.default_rng(2)
+    store = VectorStore()
+    store.load(directory)
+    new = vectors(rng, 50)
+    store.add_embeddings(new, chunks(800, 50, source="more.txt"))
+    store.save(directory)
+    store.add_embeddings(vectors(rng, 10), chunks(850, 10, source="late.txt"))
+
+    reloaded = VectorStore()
+    assert reloaded.load(directory)
+    assert len(reloaded) == 850
+    assert os.path.getsize(os.path.join(directory, VECTOR_FILE)) == 850 * DIMENSION * 2
+    assert np.allclose(reloaded.vector_file.read(np.array([10, 820])), [data[10], new[20]], atol=1e-2)
+    assert nearest_text(store, new[20]) == "chunk 820"